@@ -0,0 +1,133 @@
+"""Anytime Repairing A* (ARA*).
+
+ARA* runs weighted A* (f = g + w * h) with a large w to get a solution
+quickly, then lowers w and repairs the search instead of restarting it:
+states whose g improved after they were closed are parked in INCONS
+and fed back into the open list for the next pass.  After every pass
+the solution is at most `bound` times longer than optimal, where
+
+    bound = min(w, g(goal) / min(g + h over OPEN and INCONS))
+
+so it can report a suboptimality bound tighter than w.  The search
+keeps improving until the bound reaches 1 or the latency budget runs out.
+"""
+
+import time
+
+from IndexedHeap import KEY_SCALE, IndexedHeap
+from Solution import SearchResult, pathMoves
+from Solvability import isSolvable
+
+
+def solutions(state, heuristic=None, weight=3.0, step=0.5, time_limit=None):
+    """Yield a SearchResult for each improved solution, with its
+    suboptimality bound in stats["bound"], until the bound is 1 or
+    time_limit (seconds) runs out."""
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    layout = state.layout
+    engine = state.manhattan if heuristic is None else heuristic
+    root = state.hash
+    goal = engine.goal_state
+    if not isSolvable(layout, root, goal):
+        yield SearchResult(root, layout, None, "unsolvable", elapsed=time.perf_counter() - started)
+        return
+
+    # g << 2 | the move that reached the state, as in Astar
+    g_table = {root: 0}
+    h_table = {root: engine.h(root)}
+    closed = set()
+    incons = set()
+    w = weight
+
+    def key(s):
+        g = g_table[s] >> 2
+        return (g + w * h_table[s]) * KEY_SCALE - g
+
+    frontier = IndexedHeap()
+    frontier.push(root, key(root))
+    expanded = 0
+    found = False
+    while True:
+        # ImprovePath: weighted A* until nothing on OPEN can beat the goal
+        timed_out = False
+        while frontier and (goal not in g_table or key(goal) > frontier.peekKey()):
+            u_state, k = frontier.pop()
+            closed.add(u_state)
+            expanded += 1
+            if deadline is not None and not expanded & 1023 and time.perf_counter() > deadline:
+                timed_out = True
+                break
+            child_g = (g_table[u_state] >> 2) + 1
+            h = h_table[u_state]
+            for m, dest in layout.neighbours[layout.blank(u_state)]:
+                child = layout.move(u_state, dest)
+                old = g_table.get(child)
+                if old is not None and old >> 2 <= child_g:
+                    continue
+                g_table[child] = child_g << 2 | m
+                if old is None:
+                    h_table[child] = h + engine.delta(u_state, dest)
+                if child in closed:
+                    incons.add(child)
+                else:
+                    frontier.pushOrDecrease(child, key(child))
+
+        if timed_out:
+            if not found:
+                yield SearchResult(root, layout, None, "timeout", expanded=expanded,
+                                   elapsed=time.perf_counter() - started)
+            return
+        if goal not in g_table:
+            yield SearchResult(root, layout, None, "failed", expanded=expanded,
+                               elapsed=time.perf_counter() - started)
+            return
+
+        # the best g + h still unexpanded bounds the optimal cost from below
+        lower = min([(g_table[s] >> 2) + h_table[s] for s in frontier.items] +
+                    [(g_table[s] >> 2) + h_table[s] for s in incons] + [g_table[goal] >> 2])
+        bound = min(w, (g_table[goal] >> 2) / lower) if lower else 1.0
+        found = True
+        yield SearchResult(root, layout, pathMoves(layout, g_table, goal, root),
+                           expanded=expanded, weight=w, bound=bound,
+                           elapsed=time.perf_counter() - started)
+        if bound <= 1 or (deadline is not None and time.perf_counter() > deadline):
+            return
+
+        # tighten w and repair: INCONS rejoins OPEN, everything re-keyed
+        w = max(1.0, w - step)
+        pending = list(frontier.items) + list(incons)
+        frontier = IndexedHeap()
+        for s in pending:
+            frontier.push(s, key(s))
+        incons.clear()
+        closed.clear()
+
+
+def search(state, heuristic=None, weight=3.0, step=0.5, time_limit=None):
+    """Best solution found within time_limit (seconds); its suboptimality
+    bound is stats["bound"]"""
+    best = None
+    for result in solutions(state, heuristic, weight, step, time_limit):
+        if best is None or result.solved:
+            best = result
+    return best
+
+
+def run(state, heuristic=None, weight=3.0, time_limit=None):
+    for result in solutions(state, heuristic, weight, time_limit=time_limit):
+        if result.solved:
+            print ("weight: " + str(result.stats["weight"]) + " : " + "bound: " + str(round(result.stats["bound"], 3)) +
+                   " : " + "number of solution steps: " + str(result.cost))
+        else:
+            print ("Search " + result.status)
+
+## =================================================================
+
+if __name__ == '__main__':
+    from FifteenPuzzle import FifteenPuzzle
+
+    puzzle = ((14, 13, 11, 15), (4, 1, 6, 10), (12, 16, 8, 7), (9, 5, 3, 2))
+    state = FifteenPuzzle(puzzle)
+
+    run(state, weight=3.0, time_limit=30)
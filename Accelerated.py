@@ -0,0 +1,282 @@
+"""Optional Numba backend for IDA*.
+
+The IDA* inner loop of IDAstar (in-place make/unmake on a flat board,
+incremental Manhattan or PDB values), written over NumPy arrays so Numba
+can compile it: the neighbour tables, the Manhattan distance table and
+the memory-mapped PDB tables (read in place, without a copy) are
+arrays, and the PDB ranking is done inside the loop.
+
+search() takes the same arguments and returns the same SearchResult as
+IDAstar.search, with identical moves, iterations and node counts.  It
+uses the compiled loop when Numba is installed and NPUZZLE_ACCEL is not
+"0"; otherwise it falls back to IDAstar.search.  The loop works in
+chunks of CHUNK generated nodes so deadlines are checked from Python.
+
+    python Accelerated.py        # reference vs compiled timings
+"""
+
+import os
+import time
+
+import numpy as np
+
+import IDAstar
+from PackedState import OPPOSITE
+from Solution import SearchResult
+from Solvability import isSolvable, solutionParity
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+ENABLED = numba is not None and os.environ.get("NPUZZLE_ACCEL", "1") != "0"
+CHUNK = 1 << 20
+MAX_DEPTH = 1024
+FOUND, EXHAUSTED, PAUSED = 1, 0, 2
+
+
+def _jit(function):
+    return numba.njit(cache=True)(function) if numba is not None else function
+
+
+@_jit
+def _lookup(p, where, pattern_tiles, pattern_sizes, offsets, table, cells):
+    """PatternDatabase.lookup on arrays"""
+    r = 0
+    for i in range(pattern_sizes[p]):
+        pi = where[pattern_tiles[p, i]]
+        smaller = 0
+        for j in range(i):
+            if where[pattern_tiles[p, j]] < pi:
+                smaller += 1
+        r = r * (cells - i) + pi - smaller
+    return np.int64(table[offsets[p] + r])
+
+
+@_jit
+def _iterate(board, where, goal_board, nbr_move, nbr_dest, nbr_count, opposite, threshold,
+             use_pdb, distance, tile_pattern, pattern_tiles, pattern_sizes, offsets, table, pvals,
+             blanks, hs, nexts, saved_p, saved_v, moves, counters, budget):
+    """Run one IDA* iteration for up to budget generated nodes.
+
+    The search stack lives in blanks/hs/nexts/saved_p/saved_v/moves and
+    counters holds (depth, next threshold, expanded, generated), so a
+    PAUSED call continues where it stopped."""
+    cells = board.shape[0]
+    depth = counters[0]
+    next_threshold = counters[1]
+    expanded = counters[2]
+    generated = counters[3]
+    stop = generated + budget
+    status = EXHAUSTED
+    while depth >= 0:
+        if generated >= stop:
+            status = PAUSED
+            break
+        b = blanks[depth]
+        i = nexts[depth]
+        if i == nbr_count[b]:
+            # all children tried: unmake the move that led here
+            if depth > 0:
+                prev = blanks[depth - 1]
+                tile = board[prev]
+                board[b] = tile
+                board[prev] = 0
+                where[tile] = b
+                where[0] = prev
+                if saved_p[depth] >= 0:
+                    pvals[saved_p[depth]] = saved_v[depth]
+            depth -= 1
+            continue
+        nexts[depth] = i + 1
+        m = nbr_move[b, i]
+        dest = nbr_dest[b, i]
+        if depth > 0 and m == opposite[moves[depth - 1]]:
+            continue
+
+        generated += 1
+        h = hs[depth]
+        tile = board[dest]
+        p = -1
+        new = 0
+        if not use_pdb:
+            ch = h + distance[tile, b] - distance[tile, dest]
+        else:
+            p = tile_pattern[tile]
+            if p < 0:
+                ch = h
+            else:
+                where[tile] = b
+                new = _lookup(p, where, pattern_tiles, pattern_sizes, offsets, table, cells)
+                where[tile] = dest
+                ch = h - pvals[p] + new
+
+        f = depth + 1 + ch
+        if f > threshold:
+            if f < next_threshold:
+                next_threshold = f
+            continue
+
+        # make the move in place
+        board[b] = tile
+        board[dest] = 0
+        where[tile] = b
+        where[0] = dest
+        depth += 1
+        saved_p[depth] = p
+        if p >= 0:
+            saved_v[depth] = pvals[p]
+            pvals[p] = new
+        else:
+            saved_v[depth] = 0
+        moves[depth - 1] = m
+        blanks[depth] = dest
+        hs[depth] = ch
+        nexts[depth] = 0
+        expanded += 1
+
+        if ch == 0:
+            same = True
+            for c in range(cells):
+                if board[c] != goal_board[c]:
+                    same = False
+                    break
+            if same:
+                status = FOUND
+                break
+
+    counters[0] = depth
+    counters[1] = next_threshold
+    counters[2] = expanded
+    counters[3] = generated
+    return status
+
+
+def _tables(layout, engine):
+    """Array arguments of _iterate for a layout and heuristic engine"""
+    cells = layout.cells
+    nbr_move = np.zeros((cells, 4), dtype=np.int64)
+    nbr_dest = np.zeros((cells, 4), dtype=np.int64)
+    nbr_count = np.zeros(cells, dtype=np.int64)
+    for cell, nbrs in enumerate(layout.neighbours):
+        nbr_count[cell] = len(nbrs)
+        for i, (m, dest) in enumerate(nbrs):
+            nbr_move[cell, i] = m
+            nbr_dest[cell, i] = dest
+
+    tile_pattern = getattr(engine, "tile_pattern", None)
+    if tile_pattern is None:
+        distance = np.array(engine.distance, dtype=np.int64)
+        return (nbr_move, nbr_dest, nbr_count, False, distance, np.zeros(1, dtype=np.int64),
+                np.zeros((1, 1), dtype=np.int64), np.zeros(1, dtype=np.int64),
+                np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.uint8))
+    patterns = engine.patterns
+    pattern_tiles = np.zeros((len(patterns), max(map(len, patterns))), dtype=np.int64)
+    for p, tiles in enumerate(patterns):
+        pattern_tiles[p, :len(tiles)] = tiles
+    return (nbr_move, nbr_dest, nbr_count, True, np.zeros((1, 1), dtype=np.int64),
+            np.array([-1 if p is None else p for p in tile_pattern], dtype=np.int64),
+            pattern_tiles, np.array([len(t) for t in patterns], dtype=np.int64),
+            np.array(engine.offsets, dtype=np.int64),
+            np.frombuffer(engine.data, dtype=np.uint8))
+
+
+def search(state, heuristic=None, max_threshold=None, time_limit=None, accelerated=None):
+    """IDAstar.search through the compiled loop.  accelerated=None follows
+    ENABLED; accelerated=True runs the array loop even without Numba
+    (uncompiled, only useful to check it against the reference)."""
+    if not (ENABLED if accelerated is None else accelerated):
+        return IDAstar.search(state, heuristic, max_threshold, time_limit)
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    status = "failed"
+    layout = state.layout
+    engine = state.manhattan if heuristic is None else heuristic
+    if not isSolvable(layout, state.hash, engine.goal_state):
+        return SearchResult(state.hash, layout, None, "unsolvable", elapsed=time.perf_counter() - started)
+    parity = solutionParity(layout, state.hash, engine.goal_state)
+
+    cells = layout.cells
+    board = np.array([layout.tile(state.hash, c) for c in range(cells)], dtype=np.int64)
+    goal_board = np.array([layout.tile(engine.goal_state, c) for c in range(cells)], dtype=np.int64)
+    where = np.zeros(cells, dtype=np.int64)
+    where[board] = np.arange(cells)
+    (nbr_move, nbr_dest, nbr_count, use_pdb, distance, tile_pattern,
+     pattern_tiles, pattern_sizes, offsets, table) = _tables(layout, engine)
+    if use_pdb:
+        pvals = np.array([engine.lookup(p, where.tolist()) for p in range(len(engine.patterns))],
+                         dtype=np.int64)
+    else:
+        pvals = np.zeros(1, dtype=np.int64)
+    opposite = np.array(OPPOSITE, dtype=np.int64)
+
+    blanks = np.zeros(MAX_DEPTH + 1, dtype=np.int64)
+    hs = np.zeros(MAX_DEPTH + 1, dtype=np.int64)
+    nexts = np.zeros(MAX_DEPTH + 1, dtype=np.int64)
+    saved_p = np.zeros(MAX_DEPTH + 1, dtype=np.int64)
+    saved_v = np.zeros(MAX_DEPTH + 1, dtype=np.int64)
+    moves = np.zeros(MAX_DEPTH, dtype=np.int64)
+    counters = np.zeros(4, dtype=np.int64)
+    no_bound = np.iinfo(np.int64).max
+
+    h0 = engine.h(state.hash)
+    threshold = h0 + ((h0 - parity) & 1)
+    iterations = []
+    generated = 0
+    found = h0 == 0 and board.tolist() == goal_board.tolist()
+    depth = 0
+    while not found:
+        if max_threshold is not None and threshold > max_threshold:
+            break
+        assert threshold < MAX_DEPTH, "Solution deeper than MAX_DEPTH"
+        blanks[0] = layout.blank(state.hash)
+        hs[0] = h0
+        nexts[0] = 0
+        saved_p[0] = -1
+        counters[:] = (0, no_bound, 1, generated)
+        while True:
+            result = _iterate(board, where, goal_board, nbr_move, nbr_dest, nbr_count, opposite,
+                              threshold, use_pdb, distance, tile_pattern, pattern_tiles,
+                              pattern_sizes, offsets, table, pvals,
+                              blanks, hs, nexts, saved_p, saved_v, moves, counters, CHUNK)
+            if result != PAUSED:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                status = "timeout"
+                break
+        depth, next_threshold, expanded, generated = counters.tolist()
+        iterations.append((threshold, expanded))
+        if result == FOUND:
+            found = True
+        elif status == "timeout" or next_threshold == no_bound:
+            break
+        else:
+            threshold = next_threshold + ((next_threshold - parity) & 1)
+
+    stats = dict(iterations=iterations,
+                 expanded=sum(e for t, e in iterations),
+                 generated=generated,
+                 elapsed=time.perf_counter() - started)
+    if found:
+        return SearchResult(state.hash, layout, moves[:depth].tolist(), **stats)
+    return SearchResult(state.hash, layout, None, status, **stats)
+
+## =================================================================
+
+if __name__ == '__main__':
+    from FifteenPuzzle import FifteenPuzzle
+
+    boards = [((5, 4, 1, 6), (10, 8, 2, 12), (13, 9, 16, 7), (14, 3, 15, 11)),
+              ((16, 5, 8, 4), (9, 1, 3, 12), (10, 15, 14, 7), (2, 6, 13, 11))]
+    print ("numba: " + str(numba is not None) + " : " + "enabled: " + str(ENABLED))
+    for puzzle in boards:
+        state = FifteenPuzzle(puzzle)
+        reference = IDAstar.search(state)
+        fast = search(state)
+        fast = search(state)        # timed after compiling
+        assert fast.moves == reference.moves and fast.stats["iterations"] == reference.stats["iterations"]
+        print ("steps: " + str(fast.cost) + " : " + "expanded: " + str(fast.stats["expanded"]) + " : " +
+               "reference: %.3fs" % reference.stats["elapsed"] + " : " +
+               "accelerated: %.3fs" % fast.stats["elapsed"] + " : " +
+               "speedup: %.1fx" % (reference.stats["elapsed"] / fast.stats["elapsed"]))
@@ -1,99 +1,116 @@
-from FifteenPuzzle import FifteenPuzzle
-from EightPuzzle import EightPuzzle
-from Solution import solution
-
-try:
-    import Queue as Q  # ver. < 3.0
-except ImportError:
-    import queue as Q
-
-class Node:
-
-    def __init__(self, state, parent):
-        self.state = state
-        self.parent = parent
-        self.metric = self.makeMetric()
-        
-    def makeMetric(self):
-        self.G = 0
-        self.metric = self.G + state.heuristic()
-        
-def run(state):
-    frontier = Q.PriorityQueue()
-    frontier_metrics = dict()
-    visited_hashes = dict()
-    
-    root = Node(state, False)
-
-    frontier.put((root.metric, root))
-    frontier_metrics[root.state.hash] = root.metric
-    
-    iteration = 0
-    while not frontier.empty():
-        # u_node = frontier.get()[1]
-        u_node = frontier.get()
-        print(u_node)
-        print(f"{frontier_metrics.keys()=}")
-        print(dir(frontier_metrics))
-        # print(f"{u_node.state.hash=}")
-        
-        assert frontier_metrics.has_key(u_node.state.hash), "Frontier is missing metric"
-        
+import time
+
+from IndexedHeap import KEY_SCALE, IndexedHeap
+from Solution import SearchResult, pathMoves
+from Solvability import isSolvable
+
+
+def search(state, heuristic=None, time_limit=None, weight=1, stats=None):
+    """A* from a puzzle object; heuristic is any engine with h/delta/isGoal
+    on packed states (Manhattan by default, or a PatternDatabase).
+
+    The open list is an IndexedHeap with real decrease-key, and every state
+    has a single entry in the g table, open or closed, holding
+    g << 2 | the move that reached it, which the path is rebuilt from.  With a time_limit (seconds)
+    the search gives up with status "timeout".
+
+    weight > 1 runs weighted A* (f = g + weight * h): much faster, and
+    the solution is at most weight times longer than optimal.
+
+    stats is an optional SearchStats, updated on every expansion.
+    """
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    status = "failed"
+    layout = state.layout
+    engine = state.manhattan if heuristic is None else heuristic
+    neighbours = layout.neighbours
+    blank_shift = layout.blank_shift
+    move = layout.move
+    delta = engine.delta
+    is_goal = engine.isGoal
+
+    root = state.hash
+    if not isSolvable(layout, root, engine.goal_state):
+        return SearchResult(root, layout, None, "unsolvable", elapsed=time.perf_counter() - started)
+    g_table = {root: 0}
+    frontier = IndexedHeap()
+    frontier.push(root, weight * engine.h(root) * KEY_SCALE)
+
+    expanded = 0
+    generated = 0
+    duplicates = 0
+    decreased = 0
+    reopened = 0
+    max_frontier = 1
+    found = None
+    while frontier:
+        u_state, key = frontier.pop()
+        G = g_table[u_state] >> 2
+        if weight == 1:
+            h = (key + G) // KEY_SCALE - G
+        else:
+            h = round(((key + G) / KEY_SCALE - G) / weight)
+
         # Found the goal state?
-        if u_node.state.goal_test():
+        if is_goal(u_state):
+            found = u_state
+            break
+        expanded += 1
+        if deadline is not None and not expanded & 1023 and time.perf_counter() > deadline:
+            status = "timeout"
             break
-        
-        # test if there is a frontier node with smaller metric. If so, 
-        # get the next node
-        if frontier_metrics[u_node.state.hash] < u_node.metric:
-            continue
-
-        # record this node as 'visited'
-        visited_hashes[u_node.state.hash] = True
-        
-        # gather up the children
-        child_nodes = [Node(p, u_node) for p in u_node.state.children()]
-                    
-        for child_node in child_nodes:
-            
-            # process child if not seen before
-             if not visited_hashes.has_key(child_node.state.hash):
-                child_node.G =  u_node.G + 1
-                child_node.metric = child_node.G + child_node.state.heuristic()
-
-                # if the child is alread in the frontier, check to see which has the lower metric
-                # if the child has a lower metric than the node in the frontier, update the
-                # hash table and store the child (the matching node with the higher metric will be dropped
-                # when tested at the beginning of the while loop)
-                if frontier_metrics.has_key(child_node.state.hash):
-                    if frontier_metrics[child_node.state.hash] > child_node.metric:
-                       # print "metric: " + str(frontier_metrics[child_node.state.hash]) +  " > " + str(child_node.metric)
-                        frontier_metrics[child_node.state.hash] = child_node.metric
-                        frontier.put((child_node.metric, child_node))
-                    # if the child metric is NOT lower than the one in the frontier,  do nothing
-                else:
-                    # if the child is not in the frontier. put it there
-                    frontier_metrics[child_node.state.hash] = child_node.metric
-                    frontier.put((child_node.metric, child_node))
-                    
-        # print str(u_node.G)
-        # u_node.state.toPrint()
-        iteration += 1
-        #print str(frontier.qsize()) + " : " + str(len(frontier_metrics)) + " : " + str(len(visited_hashes))
-                
-
-    if u_node.state.goal_test():       
-
-        print ("iterations: " + str(iteration) + " : " + "number of solution steps: " +  str(u_node.metric)) 
-        print (puzzle)
-        solution(u_node)
-        
+
+        for m, dest in neighbours[u_state >> blank_shift]:
+            child = move(u_state, dest)
+            generated += 1
+            child_g = G + 1
+            old = g_table.get(child)
+            if old is not None and old >> 2 <= child_g:
+                duplicates += 1
+                continue
+
+            # h only changes by the one tile that moved
+            child_key = (child_g + weight * (h + delta(u_state, dest))) * KEY_SCALE - child_g
+            g_table[child] = child_g << 2 | m
+            if child in frontier:
+                frontier.decrease(child, child_key)
+                decreased += 1
+            else:
+                if old is not None:
+                    reopened += 1
+                frontier.push(child, child_key)
+        if len(frontier) > max_frontier:
+            max_frontier = len(frontier)
+        if stats is not None:
+            stats.record(G + h, h, len(frontier), generated, duplicates, reopened)
+
+    counts = dict(expanded=expanded, generated=generated, duplicates=duplicates,
+                  decreased=decreased, reopened=reopened, max_frontier=max_frontier,
+                  stored=len(g_table), bound=weight, elapsed=time.perf_counter() - started)
+    if found is None:
+        return SearchResult(root, layout, None, status, **counts)
+    return SearchResult(root, layout, pathMoves(layout, g_table, found, root), **counts)
+
+
+def run(state, heuristic=None, stats=None):
+    result = search(state, heuristic, stats=stats)
+    if result.solved:
+
+        print ("iterations: " + str(result.stats["expanded"]) + " : " + "number of solution steps: " +  str(result.cost))
+        print (state.puzzle)
+        for board in result.path()[1:]:
+            print (board)
+
     else:
         print ("Search failed")
 
 ## =================================================================
 
 if __name__ == '__main__':
+    from FifteenPuzzle import FifteenPuzzle
+    from EightPuzzle import EightPuzzle
+
     puzzle = ((14, 13, 11, 15), (4, 1, 6, 10), (12, 16, 8, 7), (9, 5, 3, 2))
     state = FifteenPuzzle(puzzle)
 
@@ -104,7 +121,7 @@ if __name__ == '__main__':
     puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3))
 
     # state = EightPuzzle(puzzle)
-   
+
     run(state)
 
-    
+
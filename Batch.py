@@ -0,0 +1,90 @@
+"""Solve many independent boards across a process pool.
+
+    for index, result in solve_many(boards, algorithm="idastar", workers=4,
+                                    heuristic="pdb/4x4-663.pdb", time_limit=60):
+        ...
+
+Results are yielded as each board completes, so they arrive out of
+order; index is the board's position in the input.  A pattern database
+is passed by path and memory-mapped by every worker, so all processes
+share the same read-only pages instead of each holding a copy.
+"""
+
+import ARAstar
+import Astar
+import IDAstar
+from EightPuzzle import EightPuzzle
+from FifteenPuzzle import FifteenPuzzle
+from NPuzzle import NPuzzle
+from PatternDatabase import PatternDatabase
+from Solution import SearchResult
+
+ALGORITHMS = {"astar": Astar.search, "idastar": IDAstar.search, "arastar": ARAstar.search}
+
+# per-process heuristic, opened once by the pool initializer
+_heuristic = None
+
+
+def puzzleFor(board):
+    """Puzzle object of the right class for a tuple-of-tuples board"""
+    board = tuple(map(tuple, board))
+    if len(board) == 3:
+        return EightPuzzle(board)
+    if len(board) == 4:
+        return FifteenPuzzle(board)
+    return NPuzzle(board)
+
+
+def _init(heuristic_path):
+    global _heuristic
+    _heuristic = None if heuristic_path is None else PatternDatabase(heuristic_path)
+
+
+def _solve(job):
+    """(index, SearchResult); a board that cannot be searched (malformed,
+    wrong size for the heuristic, ...) comes back with status "error"
+    instead of ending the whole stream"""
+    index, board, algorithm, time_limit = job
+    try:
+        puzzle = puzzleFor(board)
+        if _heuristic is not None and _heuristic.goal != puzzle.goal:
+            return index, SearchResult(None, None, None, "error",
+                                       error="heuristic built for another goal/size")
+        result = ALGORITHMS[algorithm](puzzle, _heuristic, time_limit=time_limit)
+    except Exception as error:
+        result = SearchResult(None, None, None, "error", error=repr(error))
+    return index, result
+
+
+def solve_many(puzzles, algorithm="idastar", workers=None, heuristic=None, time_limit=None):
+    """Yield (index, SearchResult) for every board as soon as it is solved.
+
+    algorithm is "astar", "idastar" or "arastar" (anytime: the best
+    solution within time_limit, see ARAstar); heuristic is None for Manhattan or
+    the path of a pattern database file; time_limit is seconds per board
+    (boards that run out come back with status "timeout"); workers
+    defaults to the number of CPUs, and 1 solves in this process.
+    """
+    assert algorithm in ALGORITHMS, "Unknown algorithm: " + str(algorithm)
+    jobs = ((i, board, algorithm, time_limit) for i, board in enumerate(puzzles))
+
+    if workers == 1:
+        _init(heuristic)
+        for job in jobs:
+            yield _solve(job)
+        return
+
+    # only the parent of a pool needs multiprocessing; workers skip its import
+    import multiprocessing
+    with multiprocessing.Pool(workers, _init, (heuristic,)) as pool:
+        for item in pool.imap_unordered(_solve, jobs):
+            yield item
+
+## =================================================================
+
+if __name__ == '__main__':
+    boards = [((9, 4, 8), (6, 1, 2), (7, 5, 3)),
+              ((6, 1, 2), (9, 4, 8), (7, 5, 3)),
+              ((1, 2, 3), (4, 5, 6), (9, 7, 8))]
+    for index, result in solve_many(boards):
+        print (str(index) + " : " + result.status + " : " + str(result.cost))
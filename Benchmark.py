@@ -0,0 +1,305 @@
+"""Benchmark harness with standard instance sets and regression checks.
+
+Instance sets
+    korf:<path>     boards in the standard text format of Korf's 100
+                    15-puzzle instances: one board per line, an optional
+                    instance number, then the tiles row by row with 0 for
+                    the blank ('#' lines are comments).  The goal is
+                    0 1 2 ... (blank top left).
+    random100       the bundled RANDOM100 file: 100 uniformly random
+                    solvable 15-puzzles in the same format and goal,
+                    written by writeRandom100().
+
+The korf and random100 sets need pattern databases built for their goal:
+
+    python PatternDatabase.py 4 663 pdb/4x4-663-korf.pdb --korf
+    eight:<depth>   random 8-puzzles whose optimal solution is exactly
+                    depth moves, drawn (seeded) from a full BFS layer.
+    boards:<path>   boards written by Generator (NDJSON or binary), with
+                    the standard goal.
+
+With --startup, the cold import of every STARTUP_MODULES module is timed
+in a fresh interpreter (best of the given number of runs) and reported
+as set "startup", along with whether the import loaded NumPy.
+
+Every instance is solved --repeat times, each in a freshly spawned
+worker process, and the run with the median wall time is kept.  The
+worker starts from a clean interpreter rather than a fork of the
+harness, so peak_rss_kb is its own peak (interpreter and solver imports
+included), and solve_rss_kb is how far the solve raised that peak.  Results are written as JSON; with a baseline
+file, totals per (set, solver, heuristic) are compared and the run
+fails if fewer boards were solved or nodes expanded grew by more than
+the tolerance.  Wall time and nodes/sec are only gated, against the
+looser time tolerance, where the baseline total took at least MIN_WALL
+seconds, since shorter totals are mostly noise (startup imports are
+always gated, and fail if one began loading NumPy):
+
+    python Benchmark.py eight:20 eight:24 --solver astar --solver idastar \\
+        --out bench.json --baseline baseline.json
+    python Benchmark.py --startup 5
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import Accelerated
+import ARAstar
+import Astar
+import Bidirectional
+import IDAstar
+from NPuzzle import NPuzzle, korfGoal, standardGoal
+from PatternDatabase import PatternDatabase
+
+SOLVERS = {"astar": Astar.search, "idastar": IDAstar.search,
+           "arastar": ARAstar.search, "mm": Bidirectional.search,
+           "idastar-accel": Accelerated.search}
+
+RANDOM100 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instances",
+                         "random100-4x4.txt")
+
+# baseline totals shorter than this are too noisy to gate on time
+MIN_WALL = 0.5
+
+# modules the short-lived CLI and worker processes start from
+STARTUP_MODULES = ("NPuzzle", "Astar", "IDAstar", "Batch", "Service", "SolutionCache")
+
+# peakRssKb() inlined: the probe must not import anything it does not measure
+_IMPORT_PROBE = """
+import resource, sys, time
+started = time.perf_counter()
+import %s
+wall = time.perf_counter() - started
+try:
+    with open("/proc/self/status") as f:
+        rss = [line.split()[1] for line in f if line.startswith("VmHWM:")][0]
+except (OSError, IndexError):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(wall, rss, int("numpy" in sys.modules))
+"""
+
+
+def peakRssKb():
+    """Peak RSS of this process in KB.  ru_maxrss survives fork and exec on
+    Linux, so a child would report its parent's peak; VmHWM starts afresh
+    at exec and is used where /proc has it."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def loadInstances(path, N=4):
+    """Boards from a file in the standard instance format"""
+    cells = N * N
+    boards = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            tokens = [int(t) for t in line.split()]
+            if not tokens:
+                continue
+            if len(tokens) > cells:
+                tokens = tokens[1:cells + 1]
+            assert len(tokens) == cells, "Bad instance line: " + line
+            flat = [t or cells for t in tokens]
+            boards.append(tuple(tuple(flat[r * N:(r + 1) * N]) for r in range(N)))
+    return boards
+
+
+def writeRandom100(path=RANDOM100, seed="random100-4x4"):
+    """Write the random100 set: 100 seeded uniformly random solvable
+    15-puzzles, numbered, in the standard instance format"""
+    from Generator import randomBoard
+    from PackedState import PackedBoard
+
+    layout = PackedBoard.forSize(4)
+    goal_state = layout.pack(korfGoal(4))
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("# 100 uniformly random solvable 15-puzzles, in the format of Korf's 100\n"
+                "# instances (number, then tiles row by row, 0 = blank; goal 0 1 2 ... 15).\n"
+                "# Written by Benchmark.writeRandom100() with seed %r.\n" % seed)
+        for i in range(100):
+            board = layout.unpack(randomBoard(rng, layout, goal_state))
+            tiles = [t % 16 for row in board for t in row]
+            f.write(" ".join(map(str, [i + 1] + tiles)) + "\n")
+
+
+def eightByDepth(depth, count=10, seed=0):
+    """count random 3x3 boards at exactly depth optimal moves from the goal"""
+    from LayerExpansion import LayerExpander, bfsLayers
+
+    goal = standardGoal(3)
+    expander = LayerExpander.forSize(3)
+    for d, layer in enumerate(bfsLayers(NPuzzle(goal).hash, 3)):
+        if d == depth:
+            picks = random.Random(seed).sample(range(len(layer)), min(count, len(layer)))
+            layout = expander.layout
+            return [layout.unpack(s) for s in expander.fromKeys(layer[sorted(picks)])]
+    raise ValueError("No 3x3 board is %d moves from the goal" % depth)
+
+
+def instanceSet(name, count=10, seed=0):
+    """(boards, goal) for a set name (see the module docstring)"""
+    kind, _, arg = name.partition(":")
+    if kind == "korf":
+        return loadInstances(arg), korfGoal(4)
+    if kind == "random100":
+        return loadInstances(RANDOM100), korfGoal(4)
+    if kind == "eight":
+        return eightByDepth(int(arg), count, seed), standardGoal(3)
+    if kind == "boards":
+        from Generator import read
+        boards = [board for board, depth in read(arg)]
+        return boards, standardGoal(len(boards[0]))
+    raise ValueError("Unknown instance set: " + name)
+
+
+def _solve(job):
+    board, goal, solver, heuristic, time_limit = job
+    baseline_kb = peakRssKb()
+    engine = None if heuristic == "manhattan" else PatternDatabase(heuristic)
+    if engine is not None:
+        assert engine.goal == goal, "Pattern database was built for another goal"
+    started = time.perf_counter()
+    result = SOLVERS[solver](NPuzzle(board, goal=goal), engine, time_limit=time_limit)
+    wall = time.perf_counter() - started
+    expanded = result.stats.get("expanded", 0)
+    peak_kb = peakRssKb()
+    return dict(status=result.status, cost=result.cost, expanded=expanded,
+                nodes_per_sec=expanded / wall if wall else 0.0, wall=wall,
+                peak_rss_kb=peak_kb, solve_rss_kb=peak_kb - baseline_kb)
+
+
+def importTime(module, repeat=5):
+    """Best cold-import row for module over repeat fresh interpreters"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for i in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _IMPORT_PROBE % module], cwd=here,
+                                capture_output=True, text=True, check=True).stdout
+        wall, rss, numpy = output.split()
+        if best is None or float(wall) < best["wall"]:
+            best = dict(status="solved", cost=None, expanded=0, nodes_per_sec=0.0,
+                        wall=float(wall), peak_rss_kb=int(rss), numpy=bool(int(numpy)))
+    return best
+
+
+def run(sets, solvers, heuristics=("manhattan",), count=10, seed=0, time_limit=None,
+        startup=0, repeat=1):
+    """Solve every instance with every solver/heuristic, repeat times,
+    keeping the median run; returns the report.  startup > 0 also times
+    the STARTUP_MODULES imports (best of startup)."""
+    results = []
+    for module in STARTUP_MODULES if startup else ():
+        row = importTime(module, startup)
+        row.update(set="startup", instance=0, solver=module, heuristic="import")
+        results.append(row)
+    # spawned, not forked: a fork would start with the harness's own pages resident
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for name in sets:
+            boards, goal = instanceSet(name, count, seed)
+            for solver in solvers:
+                for heuristic in heuristics:
+                    jobs = [(board, goal, solver, heuristic, time_limit)
+                            for board in boards for r in range(repeat)]
+                    rows = list(pool.imap(_solve, jobs))
+                    for index in range(len(boards)):
+                        runs = sorted(rows[index * repeat:(index + 1) * repeat],
+                                      key=lambda row: row["wall"])
+                        row = runs[len(runs) // 2]
+                        row.update(set=name, instance=index, solver=solver, heuristic=heuristic,
+                                   repeat=repeat)
+                        results.append(row)
+    return dict(meta=dict(python=sys.version.split()[0], platform=platform.platform(),
+                          date=time.strftime("%Y-%m-%d %H:%M:%S"), seed=seed),
+                results=results, summary=summarize(results))
+
+
+def summarize(results):
+    """Totals per (set, solver, heuristic), keyed "set/solver/heuristic" """
+    summary = dict()
+    for row in results:
+        key = "/".join((row["set"], row["solver"], row["heuristic"]))
+        total = summary.setdefault(key, dict(instances=0, solved=0, expanded=0,
+                                             wall=0.0, peak_rss_kb=0, solve_rss_kb=0))
+        total["instances"] += 1
+        total["solved"] += row["status"] == "solved"
+        total["expanded"] += row["expanded"]
+        total["wall"] += row["wall"]
+        total["peak_rss_kb"] = max(total["peak_rss_kb"], row["peak_rss_kb"])
+        total["solve_rss_kb"] = max(total["solve_rss_kb"], row.get("solve_rss_kb", 0))
+        if "numpy" in row:
+            total["numpy"] = total.get("numpy", False) or row["numpy"]
+    for total in summary.values():
+        total["nodes_per_sec"] = total["expanded"] / total["wall"] if total["wall"] else 0.0
+    return summary
+
+
+def compare(report, baseline, tolerance=0.10, time_tolerance=0.25):
+    """Regressions of report against a baseline report, as messages"""
+    problems = []
+    for key, now in sorted(report["summary"].items()):
+        before = baseline["summary"].get(key)
+        if before is None:
+            continue
+        if now["solved"] < before["solved"]:
+            problems.append("%s: solved %d < %d" % (key, now["solved"], before["solved"]))
+        if now["expanded"] > before["expanded"] * (1 + tolerance):
+            problems.append("%s: expanded %d > %d" % (key, now["expanded"], before["expanded"]))
+        if before["wall"] < MIN_WALL and not key.startswith("startup/"):
+            continue
+        if before["nodes_per_sec"] and \
+                now["nodes_per_sec"] < before["nodes_per_sec"] * (1 - time_tolerance):
+            problems.append("%s: nodes/sec %.0f < %.0f" % (key, now["nodes_per_sec"], before["nodes_per_sec"]))
+        if now["wall"] > before["wall"] * (1 + time_tolerance):
+            problems.append("%s: wall %.3fs > %.3fs" % (key, now["wall"], before["wall"]))
+        if now.get("numpy") and not before.get("numpy", True):
+            problems.append("%s: now imports numpy" % key)
+    return problems
+
+## =================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the puzzle solvers")
+    parser.add_argument("sets", nargs="*", help="korf:<path>, random100, eight:<depth> or boards:<path>")
+    parser.add_argument("--solver", action="append", choices=sorted(SOLVERS))
+    parser.add_argument("--heuristic", action="append", help="manhattan or a pattern database path")
+    parser.add_argument("--count", type=int, default=10, help="boards per eight:<depth> set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--repeat", type=int, default=3, help="solves per instance (median kept)")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="for solved/expanded")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="for wall and nodes/sec")
+    parser.add_argument("--startup", type=int, default=0, metavar="RUNS",
+                        help="also time cold imports, best of RUNS fresh interpreters")
+    args = parser.parse_args()
+
+    report = run(args.sets, args.solver or ["astar"], args.heuristic or ["manhattan"],
+                 args.count, args.seed, args.time_limit, args.startup, args.repeat)
+    for key, total in sorted(report["summary"].items()):
+        print (key + " : " + str(total))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.tolerance, args.time_tolerance)
+        for problem in problems:
+            print ("REGRESSION " + problem)
+        sys.exit(1 if problems else 0)
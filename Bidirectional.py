@@ -0,0 +1,341 @@
+"""Bidirectional MM search ("meet in the middle").
+
+One search runs forward from the start toward the goal and one runs
+backward from the goal toward the start (moves are reversible, so both
+use the same packed move generation).  Each direction orders its open
+list on pr = max(f, 2g), so neither searches past the midpoint of an
+optimal path.  Whenever a state generated in one direction is already
+known to the other, U = gF + gB is an upper bound on the solution.  The
+search stops as soon as
+
+    U <= max(min(prminF, prminB), fminF, fminB, gminF + gminB + 1)
+
+because the right-hand side is a lower bound on the optimal cost.
+
+With parallel=True the two directions run in separate processes.  They
+work in rounds: expand a batch, exchange the (state, g) pairs generated
+since the last round plus their open-list bounds, check the other
+side's states against their own table, then exchange the best meeting
+found.  Both sides then see the same U and bounds and stop on the same
+round, and each keeps only its own half of the search in memory.
+"""
+
+import multiprocessing
+import queue
+import time
+
+from Heuristics import Manhattan
+from IndexedHeap import INFINITY, KEY_SCALE, IndexedHeap
+from PackedState import PackedBoard, OPPOSITE
+from Solution import SearchResult, pathMoves
+from Solvability import isSolvable
+
+POLL = 0.1      # seconds between checks on the parallel workers
+
+
+class _Direction:
+    """Open list and tables of one search direction"""
+
+    def __init__(self, root, engine, layout):
+        self.engine = engine
+        self.layout = layout
+        # g << 2 | the move that reached the state, as in Astar
+        self.g = {root: 0}
+        self.root = root
+        self.open = IndexedHeap()
+        self.open_h = dict()
+        # number of open states per f and per g, for fmin and gmin
+        self.fcount = []
+        self.gcount = []
+        self.fmin_at = 0
+        self.gmin_at = 0
+        self.expanded = 0
+        self.max_open = 0
+        self._push(root, 0, engine.h(root))
+
+    def _count(self, counts, value, step):
+        while len(counts) <= value:
+            counts.append(0)
+        counts[value] += step
+
+    def _push(self, state, g, h):
+        self.open_h[state] = h
+        self._count(self.fcount, g + h, 1)
+        self._count(self.gcount, g, 1)
+        self.fmin_at = min(self.fmin_at, g + h)
+        self.gmin_at = min(self.gmin_at, g)
+        key = max(g + h, 2 * g) * KEY_SCALE - g
+        if state in self.open:
+            self.open.decrease(state, key)
+        else:
+            self.open.push(state, key)
+        if len(self.open) > self.max_open:
+            self.max_open = len(self.open)
+
+    def _forget(self, state):
+        """Drop an open state's f and g from the counts"""
+        g = self.g[state] >> 2
+        h = self.open_h.pop(state)
+        self.fcount[g + h] -= 1
+        self.gcount[g] -= 1
+
+    def prmin(self):
+        if not self.open:
+            return INFINITY
+        state = self.open.items[0]
+        g = self.g[state] >> 2
+        return (self.open.keys[0] + g) // KEY_SCALE
+
+    def _lowest(self, counts, at):
+        while at < len(counts) and counts[at] == 0:
+            at += 1
+        return at
+
+    def fmin(self):
+        if not self.open:
+            return INFINITY
+        self.fmin_at = self._lowest(self.fcount, self.fmin_at)
+        return self.fmin_at
+
+    def gmin(self):
+        if not self.open:
+            return INFINITY
+        self.gmin_at = self._lowest(self.gcount, self.gmin_at)
+        return self.gmin_at
+
+    def bounds(self):
+        return self.prmin(), self.fmin(), self.gmin()
+
+    def expand(self):
+        """Expand the state with the smallest pr; returns the states whose
+        g was set or lowered"""
+        layout = self.layout
+        delta = self.engine.delta
+        state, key = self.open.pop()
+        g = self.g[state] >> 2
+        h = self.open_h[state]
+        self._forget(state)
+        self.expanded += 1
+
+        improved = []
+        for m, dest in layout.neighbours[layout.blank(state)]:
+            child = layout.move(state, dest)
+            child_g = g + 1
+            old = self.g.get(child)
+            if old is not None and old >> 2 <= child_g:
+                continue
+            if child in self.open:
+                self._forget(child)
+            self.g[child] = child_g << 2 | m
+            self._push(child, child_g, h + delta(state, dest))
+            improved.append(child)
+        return improved
+
+
+def _lowerBound(forward, backward):
+    """MM lower bound on the optimal cost from (prmin, fmin, gmin) of each side"""
+    return max(min(forward[0], backward[0]), forward[1], backward[1],
+               forward[2] + backward[2] + 1)
+
+
+def _forwardMoves(meet, direction):
+    """Moves from the forward root to meet"""
+    return pathMoves(direction.layout, direction.g, meet, direction.root)
+
+
+def _backwardMoves(meet, direction):
+    """Moves from meet to the backward root: the backward moves to meet,
+    reversed and undone"""
+    moves = pathMoves(direction.layout, direction.g, meet, direction.root)
+    return [OPPOSITE[m] for m in reversed(moves)]
+
+
+def search(state, heuristic=None, time_limit=None, parallel=False, batch=2000):
+    """Bidirectional MM from a puzzle object.  heuristic (forward only) is
+    Manhattan by default or a PatternDatabase; the backward direction
+    uses Manhattan distance to the start.  The parallel workers open a
+    PatternDatabase again from its path, so other engines are refused."""
+    if not isSolvable(state.layout, state.hash, state.manhattan.goal_state):
+        return SearchResult(state.hash, state.layout, None, "unsolvable", elapsed=0.0)
+    if parallel:
+        assert heuristic is None or getattr(heuristic, "path", None) is not None, \
+            "The parallel search takes Manhattan or a PatternDatabase"
+        return _parallelSearch(state, time_limit, batch, heuristic and heuristic.path)
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    layout = state.layout
+    forward_engine = state.manhattan if heuristic is None else heuristic
+    # not forGoal: its cache would keep one table per start board
+    backward_engine = Manhattan(tuple(map(tuple, state.puzzle)))
+
+    start = state.hash
+    goal = forward_engine.goal_state
+    forward = _Direction(start, forward_engine, layout)
+    backward = _Direction(goal, backward_engine, layout)
+
+    U = 0 if start == goal else INFINITY
+    meet = start
+    status = "failed"
+    while U > _lowerBound(forward.bounds(), backward.bounds()):
+        if deadline is not None and not (forward.expanded + backward.expanded) & 1023 \
+           and time.perf_counter() > deadline:
+            status = "timeout"
+            break
+        if forward.prmin() <= backward.prmin():
+            side, other = forward, backward
+        else:
+            side, other = backward, forward
+        for child in side.expand():
+            other_entry = other.g.get(child)
+            if other_entry is not None and (side.g[child] >> 2) + (other_entry >> 2) < U:
+                U = (side.g[child] >> 2) + (other_entry >> 2)
+                meet = child
+
+    stats = dict(expanded=forward.expanded + backward.expanded,
+                 expanded_forward=forward.expanded, expanded_backward=backward.expanded,
+                 max_open_forward=forward.max_open, max_open_backward=backward.max_open,
+                 stored=len(forward.g) + len(backward.g),
+                 elapsed=time.perf_counter() - started)
+    if U == INFINITY or status == "timeout":
+        return SearchResult(start, layout, None, status, **stats)
+    moves = _forwardMoves(meet, forward) + _backwardMoves(meet, backward)
+    return SearchResult(start, layout, moves, **stats)
+
+
+def _worker(side, conn, results, root_board, target_board, batch, heuristic_path=None):
+    """One direction of the parallel search, run in its own process; any
+    failure is reported on the results queue as (side, "error", text)"""
+    try:
+        _direction(side, conn, results, root_board, target_board, batch, heuristic_path)
+    except Exception as error:
+        results.put((side, "error", repr(error)))
+
+
+def _exchange(side, conn, message):
+    """Swap a message with the other direction.  Forward sends first and
+    backward receives first, so a message larger than the pipe's buffer
+    cannot leave both processes blocked in send."""
+    if side == "forward":
+        conn.send(message)
+        return conn.recv()
+    other = conn.recv()
+    conn.send(message)
+    return other
+
+
+def _direction(side, conn, results, root_board, target_board, batch, heuristic_path):
+    N = len(root_board)
+    layout = PackedBoard.forSize(N)
+    if heuristic_path is None:
+        engine = Manhattan.forGoal(target_board)
+    else:
+        from PatternDatabase import PatternDatabase
+        engine = PatternDatabase(heuristic_path)
+        assert engine.goal == tuple(map(tuple, target_board)), "Pattern database was built for another goal"
+    root = layout.pack(root_board)
+    direction = _Direction(root, engine, layout)
+
+    outgoing = {root: 0}
+    U = INFINITY
+    meet = None
+    while True:
+        for i in range(batch):
+            if not direction.open:
+                break
+            for child in direction.expand():
+                outgoing[child] = direction.g[child] >> 2
+        bounds = direction.bounds()
+        incoming, other_bounds = _exchange(side, conn, (outgoing, bounds))
+        outgoing = dict()
+        for packed, other_g in incoming.items():
+            entry = direction.g.get(packed)
+            if entry is not None and (entry >> 2) + other_g < U:
+                U = (entry >> 2) + other_g
+                meet = packed
+
+        # agree on the best meeting: forward's wins ties
+        other_U, other_meet = _exchange(side, conn, (U, meet))
+        if side == "forward":
+            forward_bounds, backward_bounds = bounds, other_bounds
+            best = (U, meet) if U <= other_U else (other_U, other_meet)
+        else:
+            forward_bounds, backward_bounds = other_bounds, bounds
+            best = (other_U, other_meet) if other_U <= U else (U, meet)
+        if best[0] <= _lowerBound(forward_bounds, backward_bounds):
+            break
+
+    best_U, best_meet = best
+    if best_U == INFINITY:
+        moves = None
+    elif side == "forward":
+        moves = _forwardMoves(best_meet, direction)
+    else:
+        moves = _backwardMoves(best_meet, direction)
+    results.put((side, moves, direction.expanded, direction.max_open, len(direction.g)))
+
+
+def _parallelSearch(state, time_limit, batch, heuristic_path=None):
+    started = time.perf_counter()
+    layout = state.layout
+    goal_board = layout.unpack(state.manhattan.goal_state)
+
+    forward_conn, backward_conn = multiprocessing.Pipe()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker,
+                                       args=("forward", forward_conn, results, state.puzzle, goal_board, batch,
+                                             heuristic_path)),
+               multiprocessing.Process(target=_worker,
+                                       args=("backward", backward_conn, results, goal_board, state.puzzle, batch))]
+    for w in workers:
+        w.daemon = True
+        w.start()
+
+    # poll, so a worker that dies without reporting cannot hang the search
+    deadline = None if time_limit is None else started + time_limit
+    reports = dict()
+    status = "failed"
+    error = None
+    while len(reports) < 2:
+        try:
+            report = results.get(timeout=POLL)
+        except queue.Empty:
+            if deadline is not None and time.perf_counter() > deadline:
+                status = "timeout"
+                break
+            if not all(w.is_alive() for w in workers) and results.empty():
+                status, error = "error", "search worker exited without a result"
+                break
+            continue
+        if report[1] == "error":
+            status, error = "error", report[0] + ": " + report[2]
+            break
+        side, moves, expanded, max_open, stored = report
+        reports[side] = (moves, expanded, max_open, stored)
+    for w in workers:
+        if status != "failed":
+            w.terminate()
+        w.join()
+
+    stats = dict(elapsed=time.perf_counter() - started)
+    if error is not None:
+        stats["error"] = error
+    for side, (moves, expanded, max_open, stored) in reports.items():
+        stats["expanded_" + side] = expanded
+        stats["max_open_" + side] = max_open
+        stats["stored_" + side] = stored
+    if status != "failed" or reports["forward"][0] is None:
+        return SearchResult(state.hash, layout, None, status, **stats)
+    stats["expanded"] = stats["expanded_forward"] + stats["expanded_backward"]
+    return SearchResult(state.hash, layout, reports["forward"][0] + reports["backward"][0], **stats)
+
+## =================================================================
+
+if __name__ == '__main__':
+    from EightPuzzle import EightPuzzle
+
+    puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3))
+    state = EightPuzzle(puzzle)
+
+    for parallel in (False, True):
+        result = search(state, parallel=parallel)
+        print ("number of solution steps: " + str(result.cost) + " : " + str(result.stats))
@@ -0,0 +1,285 @@
+"""Memory-bounded A* variants.
+
+mode="sma"   SMA* (simplified memory-bounded A*).  At most max_nodes
+             search-tree nodes are kept.  When the budget is reached the
+             worst leaf (highest f, shallowest) is dropped and its f is
+             backed up into its parent, which goes back on the open list
+             and regenerates that child, with the remembered f, if it
+             becomes the best node again.  Memory is fixed; the price is
+             re-expansion.  The result is optimal whenever the optimal
+             path fits in the budget.
+
+mode="spill" A* over f-buckets.  The frontier keeps at most max_nodes
+             entries in memory; beyond that the highest-f buckets are
+             appended to a temporary file and read back when the search
+             reaches their f.  Only the frontier is bounded: the table of
+             expanded states still grows with the search.
+
+max_bytes may be given instead of max_nodes; it is converted with a
+rough per-node cost (NODE_BYTES).
+"""
+
+import os
+import struct
+import tempfile
+import time
+
+from IndexedHeap import KEY_SCALE, IndexedHeap
+from PackedState import OPPOSITE
+from Solution import SearchResult, pathMoves
+from Solvability import isSolvable
+
+NODE_BYTES = {"sma": 400, "spill": 120}
+INFINITE_F = 1 << 20
+
+
+class _Node:
+    __slots__ = ("state", "g", "f", "depth", "parent", "move", "children", "forgotten")
+
+    def __init__(self, state, g, f, depth, parent, move):
+        self.state = state
+        self.g = g
+        self.f = f
+        self.depth = depth
+        self.parent = parent
+        self.move = move
+        self.children = dict()      # move -> child node
+        self.forgotten = dict()     # move -> backed-up f of a dropped child
+
+
+def search(state, heuristic=None, max_nodes=None, max_bytes=None, mode="sma", time_limit=None,
+           stats=None):
+    """Memory-bounded A* from a puzzle object; see the module docstring.
+    stats is an optional SearchStats (spill mode only)."""
+    assert mode in NODE_BYTES, "Unknown mode: " + str(mode)
+    if max_nodes is None:
+        assert max_bytes is not None, "Give max_nodes or max_bytes"
+        max_nodes = max(16, max_bytes // NODE_BYTES[mode])
+    engine = state.manhattan if heuristic is None else heuristic
+    if not isSolvable(state.layout, state.hash, engine.goal_state):
+        return SearchResult(state.hash, state.layout, None, "unsolvable", elapsed=0.0)
+    if mode == "sma":
+        return _sma(state, engine, max_nodes, time_limit)
+    return _spill(state, engine, max_nodes, time_limit, stats)
+
+
+# -- SMA* -------------------------------------------------------------------------------
+
+def _sma(state, engine, max_nodes, time_limit):
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    layout = state.layout
+
+    # best: nodes with successors not in memory, lowest f then deepest.
+    # worst: leaves other than the root, highest f then shallowest.
+    best = IndexedHeap()
+    worst = IndexedHeap()
+
+    def bestKey(n):
+        return n.f * KEY_SCALE - n.depth
+
+    def worstKey(n):
+        return -n.f * KEY_SCALE + n.depth
+
+    def backup(n):
+        """f of an expanded node is the least f below it; it only grows"""
+        while n is not None:
+            f = min([c.f for c in n.children.values()] + list(n.forgotten.values()))
+            if f <= n.f:
+                return
+            n.f = f
+            if n in best:
+                best.remove(n)
+                best.push(n, bestKey(n))
+            if n in worst:
+                worst.decrease(n, worstKey(n))
+            n = n.parent
+
+    root = _Node(state.hash, 0, engine.h(state.hash), 0, None, None)
+    best.push(root, bestKey(root))
+    stored = 1
+    expanded = 0
+    dropped = 0
+    status = "failed"
+    found = None
+    while best:
+        n = best.items[0]
+        if n.f >= INFINITE_F:
+            break
+        if engine.isGoal(n.state):
+            found = n
+            break
+        expanded += 1
+        if deadline is not None and not expanded & 1023 and time.perf_counter() > deadline:
+            status = "timeout"
+            break
+
+        # (re)generate every successor not in memory; a forgotten child
+        # comes back with the f that was backed up when it was dropped
+        for m, dest in layout.neighbours[layout.blank(n.state)]:
+            if m in n.children or (n.move is not None and m == OPPOSITE[n.move]):
+                continue
+            child_state = layout.move(n.state, dest)
+            f = max(n.f, n.g + 1 + engine.h(child_state), n.forgotten.pop(m, 0))
+            if n.depth + 1 >= max_nodes - 1 and not engine.isGoal(child_state):
+                f = INFINITE_F      # no room left for a longer path through it
+            child = _Node(child_state, n.g + 1, f, n.depth + 1, n, m)
+            if n in worst:
+                worst.remove(n)
+            n.children[m] = child
+            best.push(child, bestKey(child))
+            worst.push(child, worstKey(child))
+            stored += 1
+        best.remove(n)
+        backup(n)
+
+        # over budget: drop the worst leaves, remembering their f in the parent
+        while stored > max_nodes and worst:
+            victim, key = worst.pop()
+            best.remove(victim)
+            parent = victim.parent
+            del parent.children[victim.move]
+            parent.forgotten[victim.move] = victim.f
+            stored -= 1
+            dropped += 1
+            if parent not in best:
+                best.push(parent, bestKey(parent))
+            if not parent.children and parent.parent is not None:
+                worst.push(parent, worstKey(parent))
+
+    stats = dict(expanded=expanded, dropped=dropped, max_nodes=max_nodes,
+                 elapsed=time.perf_counter() - started)
+    if found is None:
+        return SearchResult(state.hash, layout, None, status, **stats)
+    moves = []
+    while found.parent is not None:
+        moves.append(found.move)
+        found = found.parent
+    moves.reverse()
+    return SearchResult(state.hash, layout, moves, **stats)
+
+
+# -- bucketed A* with spilling ------------------------------------------------------------
+
+class _SpillFile:
+    """Frontier buckets written out to a temporary file"""
+
+    def __init__(self, state_bytes):
+        self.state_bytes = state_bytes
+        self.record = struct.Struct("<H%ds" % state_bytes)
+        self.file = tempfile.TemporaryFile()
+        self.spans = dict()     # f -> list of (offset, count)
+        self.count = 0
+
+    def write(self, f, entries):
+        self.file.seek(0, os.SEEK_END)
+        offset = self.file.tell()
+        n = self.state_bytes
+        self.file.write(b"".join(self.record.pack(g, s.to_bytes(n, "little")) for s, g in entries))
+        self.spans.setdefault(f, []).append((offset, len(entries)))
+        self.count += len(entries)
+
+    def read(self, f):
+        entries = []
+        for offset, count in self.spans.pop(f, ()):
+            self.file.seek(offset)
+            data = self.file.read(count * self.record.size)
+            for g, s in self.record.iter_unpack(data):
+                entries.append((int.from_bytes(s, "little"), g))
+        self.count -= len(entries)
+        return entries
+
+    def close(self):
+        self.file.close()
+
+
+def _spill(state, engine, max_nodes, time_limit, stats):
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    layout = state.layout
+    spill = _SpillFile((layout.blank_shift + layout.bits + 7) // 8)
+
+    root = state.hash
+    buckets = {engine.h(root): [(root, 0)]}
+    in_memory = 1
+    g_table = {root: 0}         # g << 2 | the move that reached the state
+    closed = set()
+    expanded = 0
+    generated = 0
+    duplicates = 0
+    reopened = 0
+    stale = 0
+    spilled = 0
+    status = "failed"
+    found = None
+    try:
+        while buckets or spill.spans:
+            f = min(list(buckets) + list(spill.spans))
+            bucket = buckets.setdefault(f, [])
+            if f in spill.spans:
+                reloaded = spill.read(f)
+                bucket.extend(reloaded)
+                in_memory += len(reloaded)
+            if not bucket:
+                del buckets[f]
+                continue
+            u_state, G = bucket.pop()
+            in_memory -= 1
+            if u_state in closed or G > g_table[u_state] >> 2:
+                stale += 1      # stale duplicate
+                continue
+            if engine.isGoal(u_state):
+                found = u_state
+                break
+            closed.add(u_state)
+            expanded += 1
+            if deadline is not None and not expanded & 1023 and time.perf_counter() > deadline:
+                status = "timeout"
+                break
+
+            h = f - G
+            for m, dest in layout.neighbours[layout.blank(u_state)]:
+                child = layout.move(u_state, dest)
+                generated += 1
+                old = g_table.get(child)
+                if old is not None and old >> 2 <= G + 1:
+                    duplicates += 1
+                    continue
+                if child in closed:
+                    closed.discard(child)
+                    reopened += 1
+                g_table[child] = (G + 1) << 2 | m
+                child_f = G + 1 + h + engine.delta(u_state, dest)
+                buckets.setdefault(child_f, []).append((child, G + 1))
+                in_memory += 1
+            if stats is not None:
+                stats.record(f, h, in_memory, generated, duplicates, reopened, stale)
+
+            # over budget: write out the coldest (highest f) buckets
+            while in_memory > max_nodes and len(buckets) > 1:
+                cold = max(buckets)
+                entries = buckets.pop(cold)
+                spill.write(cold, entries)
+                in_memory -= len(entries)
+                spilled += len(entries)
+    finally:
+        spill.close()
+
+    counts = dict(expanded=expanded, generated=generated, duplicates=duplicates,
+                  reopened=reopened, stale=stale, spilled=spilled, max_nodes=max_nodes,
+                  stored=len(g_table), elapsed=time.perf_counter() - started)
+    if found is None:
+        return SearchResult(root, layout, None, status, **counts)
+    return SearchResult(root, layout, pathMoves(layout, g_table, found, root), **counts)
+
+## =================================================================
+
+if __name__ == '__main__':
+    from EightPuzzle import EightPuzzle
+
+    puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3))
+    state = EightPuzzle(puzzle)
+
+    for mode in ("sma", "spill"):
+        result = search(state, max_nodes=200, mode=mode)
+        print (mode + " : " + "number of solution steps: " + str(result.cost) + " : " + str(result.stats))
@@ -0,0 +1,228 @@
+"""Disk-backed breadth-first search over a whole puzzle state space.
+
+Each BFS layer is a file of sorted, unique uint64 board keys (see
+LayerExpansion), stored as zlib-compressed blocks of delta-encoded
+values.  Layer d+1 is made by streaming layer d through the vectorized
+expander in chunks, writing each chunk's sorted successors as a run
+file, then streaming a k-way merge of the runs while subtracting layers
+d and d-1 (in an undirected graph no other layer can hold a duplicate).
+Only one chunk per stream is ever in memory.
+
+Progress is recorded in manifest.json after every finished layer, so an
+interrupted search resumes from the last complete layer:
+
+    python ExternalBFS.py 3 /tmp/bfs3
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from LayerExpansion import LayerExpander
+from NPuzzle import NPuzzle, standardGoal
+
+BLOCK = struct.Struct("<II")
+CHUNK = 1 << 20
+
+
+def writeSorted(path, chunks):
+    """Write ascending uint64 chunks as compressed delta blocks; returns
+    the number of values written"""
+    count = 0
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            deltas = np.diff(chunk, prepend=np.uint64(0)).astype("<u8")
+            data = zlib.compress(deltas.tobytes(), 1)
+            f.write(BLOCK.pack(len(chunk), len(data)))
+            f.write(data)
+            count += len(chunk)
+    return count
+
+
+def readSorted(path):
+    """Yield the uint64 chunks of a file written by writeSorted"""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(BLOCK.size)
+            if not header:
+                return
+            n, size = BLOCK.unpack(header)
+            deltas = np.frombuffer(zlib.decompress(f.read(size)), dtype="<u8")
+            yield np.cumsum(deltas, dtype=np.uint64)
+
+
+def rechunk(chunks, size):
+    """Split incoming arrays into pieces of at most size values"""
+    for chunk in chunks:
+        for start in range(0, len(chunk), size):
+            yield chunk[start:start + size]
+
+
+class _Cursor:
+    """Consumes a sorted chunk stream in ascending order"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = np.empty(0, dtype=np.uint64)
+        self.done = False
+        self._fill()
+
+    def _fill(self):
+        while not len(self.buffer) and not self.done:
+            try:
+                self.buffer = next(self.chunks)
+            except StopIteration:
+                self.done = True
+
+    def upTo(self, value):
+        """Remove and return every value <= value"""
+        taken = []
+        while not self.done:
+            cut = np.searchsorted(self.buffer, value, side="right")
+            taken.append(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+            if len(self.buffer):
+                break
+            self._fill()
+        return np.concatenate(taken) if taken else self.buffer[:0]
+
+
+def mergeUnique(streams):
+    """k-way merge of sorted chunk streams into sorted unique chunks"""
+    cursors = [_Cursor(s) for s in streams]
+    while True:
+        live = [c for c in cursors if not c.done]
+        if not live:
+            return
+        # every value up to the smallest buffered maximum is final
+        cutoff = min(c.buffer[-1] for c in live)
+        merged = np.unique(np.concatenate([c.upTo(cutoff) for c in live]))
+        if len(merged):
+            yield merged
+
+
+def subtract(chunks, excluded):
+    """Sorted chunks minus every value of the sorted excluded streams"""
+    cursors = [_Cursor(s) for s in excluded]
+    for chunk in chunks:
+        top = chunk[-1]
+        for cursor in cursors:
+            chunk = chunk[~np.isin(chunk, cursor.upTo(top), assume_unique=True)]
+        if len(chunk):
+            yield chunk
+
+
+class ExternalBFS:
+    """Resumable layer-by-layer BFS stored under one directory"""
+
+    def __init__(self, directory, N=None, start=None, chunk=CHUNK, keep_layers=True):
+        self.directory = directory
+        self.chunk = chunk
+        self.keep_layers = keep_layers
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            assert N is not None, "A new search needs the board size"
+            if start is None:
+                start = NPuzzle(standardGoal(N)).hash
+            expander = LayerExpander.forSize(N)
+            self.manifest = dict(N=N, start=int(expander.toKeys([start])[0]),
+                                 layers=[], complete=False)
+        self.expander = LayerExpander.forSize(self.manifest["N"])
+
+    def layerPath(self, depth):
+        return os.path.join(self.directory, "layer-%03d.bin" % depth)
+
+    def _save(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def _cleanup(self):
+        """Drop partial files left by an interrupted layer"""
+        for name in os.listdir(self.directory):
+            if name.startswith("run-") or name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+
+    def _nextLayer(self, depth):
+        """Build layer depth + 1 from layer depth; returns its size"""
+        runs = []
+        for i, chunk in enumerate(rechunk(readSorted(self.layerPath(depth)), self.chunk)):
+            run = os.path.join(self.directory, "run-%05d.bin" % i)
+            writeSorted(run, [np.unique(self.expander.expand(chunk)[0])])
+            runs.append(run)
+
+        excluded = [readSorted(self.layerPath(depth))]
+        if depth > 0:
+            excluded.append(readSorted(self.layerPath(depth - 1)))
+        merged = mergeUnique([rechunk(readSorted(r), self.chunk) for r in runs])
+        tmp = self.layerPath(depth + 1) + ".tmp"
+        count = writeSorted(tmp, rechunk(subtract(merged, excluded), self.chunk))
+        os.replace(tmp, self.layerPath(depth + 1))
+        for run in runs:
+            os.remove(run)
+        return count
+
+    def run(self, max_depth=None, verbose=False):
+        """Search until the space is exhausted (or max_depth); returns the
+        per-layer statistics"""
+        self._cleanup()
+        layers = self.manifest["layers"]
+        if not layers:
+            started = time.perf_counter()
+            writeSorted(self.layerPath(0), [np.array([self.manifest["start"]], dtype=np.uint64)])
+            layers.append(dict(depth=0, states=1, bytes=os.path.getsize(self.layerPath(0)),
+                               seconds=time.perf_counter() - started))
+            self._save()
+
+        while not self.manifest["complete"]:
+            depth = len(layers) - 1
+            if max_depth is not None and depth >= max_depth:
+                break
+            started = time.perf_counter()
+            count = self._nextLayer(depth)
+            if count == 0:
+                os.remove(self.layerPath(depth + 1))
+                self.manifest["complete"] = True
+            else:
+                layers.append(dict(depth=depth + 1, states=count,
+                                   bytes=os.path.getsize(self.layerPath(depth + 1)),
+                                   seconds=time.perf_counter() - started))
+                if not self.keep_layers and depth >= 1:
+                    os.remove(self.layerPath(depth - 1))
+            self._save()
+            if verbose and count:
+                print (layers[-1])
+        return layers
+
+    def histogram(self):
+        """Number of states at every optimal distance from the start"""
+        return [layer["states"] for layer in self.manifest["layers"]]
+
+    def layer(self, depth):
+        """Yield the sorted key chunks of one finished layer"""
+        return readSorted(self.layerPath(depth))
+
+## =================================================================
+
+if __name__ == '__main__':
+    # python ExternalBFS.py <N> <directory> [chunk size]
+    N = int(sys.argv[1])
+    directory = sys.argv[2]
+    chunk = int(sys.argv[3]) if len(sys.argv) > 3 else CHUNK
+    bfs = ExternalBFS(directory, N, chunk=chunk)
+    bfs.run(verbose=True)
+    histogram = bfs.histogram()
+    print ("layers: " + str(len(histogram)) + " : " + "states: " + str(sum(histogram)))
+    print (histogram)
@@ -0,0 +1,245 @@
+"""Seeded generator of random solvable boards at controlled depth.
+
+Boards come from one of two samplers:
+
+    uniform   a uniformly random permutation, with two tiles swapped when
+              it has the wrong parity, so every solvable board is equally
+              likely
+    walk      a walk of `walk` random blank moves from the goal that never
+              undoes its previous move
+
+With a target distribution ({optimal depth: count}) every board is
+measured, by the Oracle table for 3x3 when one is given and by IDAstar
+otherwise, and kept only while its depth still has quota.  Without one
+boards are measured only when asked to be.
+
+The work is cut into shards of SHARD boards, each with its own RNG seeded
+from (seed, shard), so the output does not depend on the number of
+workers.  Output is NDJSON ({"id", "board", "depth"} lines, which Service
+takes as requests) or, for files ending in .bin, 9-byte records (uint64
+board key as in LayerExpansion, depth byte) behind a small header.
+
+    python Generator.py boards.ndjson --count 1000000 --workers 8
+    python Generator.py boards.bin --depth 20:1000 --depth 24:1000 --oracle oracle-3x3.bin
+    python Generator.py boards.bin -N 4 --mode walk --walk 60 --count 100000
+"""
+
+import argparse
+import json
+import random
+import struct
+import sys
+
+import IDAstar
+from NPuzzle import NPuzzle, standardGoal
+from PackedState import OPPOSITE, PackedBoard
+from Solvability import isSolvable
+
+MAGIC = b"NPIN"
+VERSION = 1
+RECORD = struct.Struct("<QB")
+NO_DEPTH = 255
+SHARD = 10000
+WALK = 100
+MODES = ("uniform", "walk")
+
+# per-process depth measures, opened once by the pool initializer
+_oracle = None
+_heuristic = None
+
+
+def randomBoard(rng, layout, goal_state):
+    """Uniformly random packed state that can reach goal_state"""
+    tiles = list(range(layout.cells))
+    rng.shuffle(tiles)
+    state = 0
+    for tile, shift in zip(tiles, layout.shifts):
+        state |= tile << shift
+    state |= tiles.index(0) << layout.blank_shift
+    if not isSolvable(layout, state, goal_state):
+        # swapping two tiles flips the permutation parity only
+        a, b = [c for c, t in enumerate(tiles) if t][:2]
+        sa, sb = layout.shifts[a], layout.shifts[b]
+        state ^= (tiles[a] ^ tiles[b]) << sa | (tiles[a] ^ tiles[b]) << sb
+    return state
+
+
+def randomWalk(rng, layout, state, length):
+    """State after length random blank moves that never undo the last one"""
+    undo = None
+    for i in range(length):
+        options = [(m, d) for m, d in layout.neighbours[layout.blank(state)] if m != undo]
+        m, dest = rng.choice(options)
+        state = layout.move(state, dest)
+        undo = OPPOSITE[m]
+    return state
+
+
+def _init(oracle_path, heuristic_path):
+    global _oracle, _heuristic
+    if oracle_path is not None:
+        from Oracle import Oracle
+        _oracle = Oracle(oracle_path)
+    if heuristic_path is not None:
+        from PatternDatabase import PatternDatabase
+        _heuristic = PatternDatabase(heuristic_path)
+
+
+def depthOf(layout, state):
+    """Optimal solution length of a solvable packed state"""
+    if _oracle is not None and _oracle.layout is layout:
+        return _oracle.cost(state)
+    return IDAstar.search(NPuzzle(layout.unpack(state)), _heuristic).cost
+
+
+def _shard(job):
+    """(records, shortfall) of one shard: records are (state, depth)"""
+    N, mode, walk, count, quotas, measure, seed, shard, max_draws = job
+    rng = random.Random("%s:%d" % (seed, shard))
+    layout = PackedBoard.forSize(N)
+    goal_state = layout.pack(standardGoal(N))
+    records = []
+    draws = 0
+    while len(records) < count and draws < max_draws:
+        draws += 1
+        if mode == "uniform":
+            state = randomBoard(rng, layout, goal_state)
+        else:
+            state = randomWalk(rng, layout, goal_state, walk)
+        depth = depthOf(layout, state) if measure else None
+        if quotas is not None:
+            if not quotas.get(depth):
+                continue
+            quotas[depth] -= 1
+        records.append((state, depth))
+    shortfall = dict((d, q) for d, q in (quotas or dict()).items() if q)
+    return records, shortfall
+
+
+def generate(N=3, count=None, mode="uniform", walk=WALK, depths=None, seed=0, workers=1,
+             oracle=None, heuristic=None, measure=False, max_draws=1000):
+    """Yield (packed state, depth) records, count of them or, with depths
+    ({optimal depth: count}), that many of each depth.  depth is None for
+    unmeasured boards.  oracle and heuristic are paths of an Oracle table
+    and a PatternDatabase used to measure depth.  A shard gives up after
+    max_draws draws per board it has to produce; the depths still missing
+    are returned by the generator (StopIteration.value)."""
+    assert mode in MODES, "Unknown mode: " + str(mode)
+    if depths is not None:
+        count = sum(depths.values())
+    assert count is not None, "Give a count or a depth distribution"
+    shards = max(1, -(-count // SHARD))
+    jobs = []
+    for i in range(shards):
+        if depths is None:
+            quotas = None
+            size = count // shards + (i < count % shards)
+        else:
+            quotas = dict((d, q // shards + (i < q % shards)) for d, q in depths.items())
+            size = sum(quotas.values())
+        jobs.append((N, mode, walk, size, quotas, measure or depths is not None, seed, i,
+                     max_draws * size))
+
+    if workers == 1:
+        _init(oracle, heuristic)
+        results = map(_shard, jobs)
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers, _init, (oracle, heuristic))
+        results = pool.imap(_shard, jobs)
+
+    missing = dict()
+    try:
+        for records, shortfall in results:
+            for record in records:
+                yield record
+            for d, q in shortfall.items():
+                missing[d] = missing.get(d, 0) + q
+    finally:
+        if workers != 1:
+            pool.terminate()
+    return missing
+
+
+def write(path, records, N):
+    """Write (state, depth) records as NDJSON, or binary for a .bin path;
+    returns the number written"""
+    layout = PackedBoard.forSize(N)
+    written = 0
+    if path.endswith(".bin"):
+        assert layout.blank_shift <= 64, "Binary records only fit boards up to 4x4"
+        with open(path, "wb") as f:
+            f.write(MAGIC + struct.pack("<BB", VERSION, N))
+            for state, depth in records:
+                f.write(RECORD.pack(state & layout.board_mask, NO_DEPTH if depth is None else depth))
+                written += 1
+    else:
+        with open(path, "w") as f:
+            for state, depth in records:
+                f.write(json.dumps({"id": written, "board": layout.unpack(state), "depth": depth}) + "\n")
+                written += 1
+    return written
+
+
+def read(path):
+    """Yield (board, depth) from a file written by write()"""
+    with open(path, "rb") as f:
+        head = f.read(6)
+        if head[:4] != MAGIC:
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    yield tuple(map(tuple, item["board"])), item.get("depth")
+            return
+        version, N = struct.unpack_from("<BB", head, 4)
+        assert version == VERSION, "Unsupported instance file version"
+        from LayerExpansion import LayerExpander
+        import numpy as np
+
+        expander = LayerExpander.forSize(N)
+        records = np.frombuffer(f.read(), dtype=[("key", "<u8"), ("depth", "u1")])
+    states = expander.fromKeys(records["key"].copy())
+    for state, depth in zip(states, records["depth"].tolist()):
+        yield expander.layout.unpack(state), None if depth == NO_DEPTH else depth
+
+## =================================================================
+
+if __name__ == '__main__':
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate random solvable boards")
+    parser.add_argument("out", help="NDJSON file, or binary if it ends in .bin")
+    parser.add_argument("-N", type=int, default=3, help="board size")
+    parser.add_argument("--count", type=int, help="boards to write (without --depth)")
+    parser.add_argument("--depth", action="append", metavar="DEPTH:COUNT",
+                        help="target distribution: COUNT boards at optimal depth DEPTH")
+    parser.add_argument("--mode", default="uniform", choices=MODES)
+    parser.add_argument("--walk", type=int, default=WALK, help="moves per walk")
+    parser.add_argument("--measure", action="store_true", help="record the depth of every board")
+    parser.add_argument("--oracle", help="Oracle table path (3x3 depths)")
+    parser.add_argument("--heuristic", help="pattern database path for IDAstar depths")
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-draws", type=int, default=1000, help="draws per board before giving up")
+    args = parser.parse_args()
+
+    depths = None
+    if args.depth:
+        depths = dict()
+        for item in args.depth:
+            d, _, q = item.partition(":")
+            depths[int(d)] = depths.get(int(d), 0) + int(q)
+    started = time.perf_counter()
+    records = generate(args.N, args.count, args.mode, args.walk, depths, args.seed, args.workers,
+                       args.oracle, args.heuristic, args.measure, args.max_draws)
+    missing = dict()
+
+    def collect():
+        missing.update((yield from records))
+
+    written = write(args.out, collect(), args.N)
+    print ("boards: " + str(written) + " : " + "%.2fs" % (time.perf_counter() - started))
+    if missing:
+        print ("missing: " + str(dict(sorted(missing.items()))))
+        sys.exit(1)
@@ -0,0 +1,176 @@
+"""Batched NumPy heuristic kernels.
+
+Every kernel scores an (M, N*N) integer array of flat boards in one
+call, using the repo's tile numbering (blank == N*N), and returns an
+(M,) array of lower bounds on the distance to the goal:
+
+    kernels = Kernels.forGoal(EightPuzzle.goal)
+    h = kernels.linearConflict(boardsArray(puzzles))
+
+manhattan       sum of tile distances to their goal cells
+linearConflict  Manhattan plus 2 for every tile that must leave its
+                goal row or column to let the others pass (line length
+                minus the longest increasing run of goal positions)
+walkingDistance vertical plus horizontal walking distance, looked up in
+                tables built once per goal by BFS over row/column
+                occupancy counts
+"""
+
+import numpy as np
+
+from PackedState import PackedBoard
+
+
+def boardsArray(puzzles):
+    """(M, N*N) array from tuple-of-tuples boards"""
+    return np.array([[t for row in p for t in row] for p in puzzles], dtype=np.int16)
+
+
+def packedArray(states, N):
+    """(M, N*N) array from packed states"""
+    layout = PackedBoard.forSize(N)
+    cells = layout.cells
+    mask = layout.mask
+    return np.array([[(s >> shift) & mask or cells for shift in layout.shifts] for s in states],
+                    dtype=np.int16)
+
+
+class Kernels:
+    """Heuristic kernels for one goal, with its lookup tables"""
+
+    _kernels = dict()
+
+    @classmethod
+    def forGoal(cls, goal):
+        """Return the (cached) kernels for a goal board"""
+        key = tuple(map(tuple, goal))
+        kernels = cls._kernels.get(key)
+        if kernels is None:
+            kernels = cls._kernels[key] = cls(key)
+        return kernels
+
+    def __init__(self, goal):
+        self.goal = goal
+        self.N = N = len(goal)
+        self.cells = cells = N * N
+        flat = np.array([t for row in goal for t in row])
+        # goal row / column of every tile number (index 0 unused)
+        self.goal_row = np.zeros(cells + 1, dtype=np.int16)
+        self.goal_col = np.zeros(cells + 1, dtype=np.int16)
+        self.goal_row[flat] = np.arange(cells) // N
+        self.goal_col[flat] = np.arange(cells) % N
+        self.cell_row = (np.arange(cells) // N).astype(np.int16)
+        self.cell_col = (np.arange(cells) % N).astype(np.int16)
+        self._walking = None
+
+    def manhattan(self, boards):
+        boards = np.asarray(boards)
+        tiles = boards != self.cells
+        dist = np.abs(self.goal_row[boards] - self.cell_row) + np.abs(self.goal_col[boards] - self.cell_col)
+        return (dist * tiles).sum(axis=1)
+
+    def _lineConflicts(self, lines, goal_line, goal_pos, blank):
+        """Tiles to remove per board so every line's goal tiles are in
+        order; lines is (M, N, N) tile numbers, one row of each per line"""
+        N = self.N
+        total = np.zeros(lines.shape[0], dtype=np.int32)
+        for line in range(N):
+            tiles = lines[:, line, :]
+            home = (goal_line[tiles] == line) & (tiles != blank)
+            pos = goal_pos[tiles]
+            # longest increasing run of goal positions among home tiles
+            run = np.zeros(tiles.shape, dtype=np.int32)
+            for j in range(N):
+                best = np.zeros(tiles.shape[0], dtype=np.int32)
+                for i in range(j):
+                    ok = home[:, i] & (pos[:, i] < pos[:, j])
+                    best = np.maximum(best, np.where(ok, run[:, i], 0))
+                run[:, j] = np.where(home[:, j], best + 1, 0)
+            total += home.sum(axis=1) - run.max(axis=1)
+        return total
+
+    def linearConflict(self, boards):
+        boards = np.asarray(boards)
+        N = self.N
+        grid = boards.reshape(-1, N, N)
+        rows = self._lineConflicts(grid, self.goal_row, self.goal_col, self.cells)
+        cols = self._lineConflicts(grid.transpose(0, 2, 1), self.goal_col, self.goal_row, self.cells)
+        return self.manhattan(boards) + 2 * (rows + cols)
+
+    # -- walking distance -------------------------------------------------------
+
+    def _walkingTable(self, goal_lines, goal_line):
+        """Sorted occupancy keys and their BFS distances for one axis.
+
+        goal_lines is the goal as a list of lines (rows, or columns for the
+        horizontal table).  A configuration counts, for every line r and goal
+        line k, how many tiles sit in line r that belong in line k, plus the
+        blank's line.  The last count of each line is implied, so it is left
+        out of the key.
+        """
+        N = self.N
+        base = N + 1
+
+        def key(counts, blank):
+            k = 0
+            for r in range(N):
+                for g in range(N - 1):
+                    k = k * base + counts[r][g]
+            return k * N + blank
+
+        start = [[0] * N for r in range(N)]
+        for r, line in enumerate(goal_lines):
+            for tile in line:
+                if tile == self.cells:
+                    goal_blank = r
+                else:
+                    start[r][int(goal_line[tile])] += 1
+
+        distances = {key(start, goal_blank): 0}
+        layer = [(tuple(map(tuple, start)), goal_blank)]
+        d = 0
+        while layer:
+            d += 1
+            next_layer = []
+            for counts, blank in layer:
+                for other in (blank - 1, blank + 1):
+                    if not 0 <= other < N:
+                        continue
+                    for g in range(N):
+                        if counts[other][g] == 0:
+                            continue
+                        moved = [list(row) for row in counts]
+                        moved[other][g] -= 1
+                        moved[blank][g] += 1
+                        k = key(moved, other)
+                        if k not in distances:
+                            distances[k] = d
+                            next_layer.append((tuple(map(tuple, moved)), other))
+            layer = next_layer
+
+        keys = np.array(sorted(distances), dtype=np.int64)
+        values = np.array([distances[k] for k in keys.tolist()], dtype=np.int16)
+        return keys, values
+
+    def _walkingKeys(self, lines, goal_line):
+        """Occupancy keys of (M, N, N) boards, one row of lines per line"""
+        N = self.N
+        base = N + 1
+        tiles = lines != self.cells
+        home = np.where(tiles, goal_line[lines], -1)
+        counts = (home[:, :, :, None] == np.arange(N - 1)).sum(axis=2)
+        weights = base ** np.arange(N * (N - 1) - 1, -1, -1, dtype=np.int64)
+        blank = np.argmax(~tiles.reshape(len(lines), -1), axis=1) // N
+        return (counts.reshape(len(lines), -1).astype(np.int64) * weights).sum(axis=1) * N + blank
+
+    def walkingDistance(self, boards):
+        if self._walking is None:
+            columns = tuple(zip(*self.goal))
+            self._walking = (self._walkingTable(self.goal, self.goal_row),
+                             self._walkingTable(columns, self.goal_col))
+        (row_keys, row_values), (col_keys, col_values) = self._walking
+        boards = np.asarray(boards)
+        grid = boards.reshape(-1, self.N, self.N)
+        vertical = row_values[np.searchsorted(row_keys, self._walkingKeys(grid, self.goal_row))]
+        horizontal = col_values[np.searchsorted(col_keys, self._walkingKeys(grid.transpose(0, 2, 1), self.goal_col))]
+        return vertical.astype(np.int32) + horizontal
@@ -0,0 +1,60 @@
+"""Heuristic engines working directly on packed states (see PackedState)."""
+
+from PackedState import PackedBoard
+
+
+class Manhattan:
+    """Manhattan distance to one goal, with per-move incremental updates"""
+
+    _engines = dict()
+
+    @classmethod
+    def forGoal(cls, goal):
+        """Return the (cached) engine for a goal board"""
+        key = tuple(map(tuple, goal))
+        engine = cls._engines.get(key)
+        if engine is None:
+            engine = cls._engines[key] = cls(key)
+        return engine
+
+    def __init__(self, goal):
+        self.goal = goal
+        self.N = len(goal)
+        self.layout = PackedBoard.forSize(self.N)
+        self.goal_state = self.layout.pack(goal)
+
+        # distance[tile][cell]: moves for tile from cell to its goal cell.
+        # Row 0 belongs to the blank and is all zeros.
+        N = self.N
+        cells = self.layout.cells
+        goal_cell = dict()
+        for cell in range(cells):
+            tile = goal[cell // N][cell % N]
+            goal_cell[0 if tile == cells else tile] = cell
+        table = []
+        for tile in range(cells):
+            if tile == 0:
+                table.append((0,) * cells)
+                continue
+            gr, gc = divmod(goal_cell[tile], N)
+            table.append(tuple(abs(gr - c // N) + abs(gc - c % N) for c in range(cells)))
+        self.distance = tuple(table)
+
+    def h(self, state):
+        """Full Manhattan sum of a packed state"""
+        mask = self.layout.mask
+        distance = self.distance
+        total = 0
+        for cell, shift in enumerate(self.layout.shifts):
+            total += distance[(state >> shift) & mask][cell]
+        return total
+
+    def delta(self, state, dest):
+        """Change in h when the tile in cell dest slides into the blank"""
+        layout = self.layout
+        row = self.distance[(state >> layout.shifts[dest]) & layout.mask]
+        return row[state >> layout.blank_shift] - row[dest]
+
+    def isGoal(self, state):
+        """O(1) goal test"""
+        return state == self.goal_state
@@ -0,0 +1,183 @@
+"""Iterative-deepening A* on a single mutable board.
+
+Each iteration is a depth-first search bounded by f = g + h <= threshold;
+the next threshold is the smallest f that was cut off, rounded up to the
+parity every solution length shares (see Solvability).  Moves are made
+and unmade in place on one flat board list, the move that would undo the
+previous one is never tried, and the heuristic is updated from the one
+tile that moved, so the inner loop allocates no per-node objects.
+"""
+
+import time
+
+from IndexedHeap import INFINITY
+from PackedState import OPPOSITE
+from Solution import SearchResult
+from Solvability import isSolvable, solutionParity
+
+
+def search(state, heuristic=None, max_threshold=None, time_limit=None):
+    """IDA* from a puzzle object; heuristic is Manhattan by default or a
+    PatternDatabase.  Returns a SearchResult whose stats hold the
+    (threshold, nodes expanded) of every iteration.  With a time_limit
+    (seconds) the search gives up with status "timeout"."""
+    started = time.perf_counter()
+    deadline = None if time_limit is None else started + time_limit
+    status = "failed"
+    layout = state.layout
+    engine = state.manhattan if heuristic is None else heuristic
+    neighbours = layout.neighbours
+    if not isSolvable(layout, state.hash, engine.goal_state):
+        return SearchResult(state.hash, layout, None, "unsolvable", elapsed=time.perf_counter() - started)
+    parity = solutionParity(layout, state.hash, engine.goal_state)
+
+    board = [layout.tile(state.hash, c) for c in range(layout.cells)]
+    goal_board = [layout.tile(engine.goal_state, c) for c in range(layout.cells)]
+    where = [0] * layout.cells
+    for cell, tile in enumerate(board):
+        where[tile] = cell
+
+    # Manhattan updates from its distance table; a PDB re-looks-up the
+    # pattern of the moved tile and keeps the value of every pattern
+    tile_pattern = getattr(engine, "tile_pattern", None)
+    if tile_pattern is None:
+        distance = engine.distance
+    else:
+        lookup = engine.lookup
+        pvals = [lookup(p, where) for p in range(len(engine.patterns))]
+
+    h0 = engine.h(state.hash)
+    threshold = h0 + ((h0 - parity) & 1)
+    iterations = []
+    generated = 0
+    moves = []
+
+    found = h0 == 0 and board == goal_board
+    while not found and threshold < INFINITY:
+        if max_threshold is not None and threshold > max_threshold:
+            break
+        expanded = 0
+        next_threshold = INFINITY
+
+        # per-depth stacks of plain ints: blank cell, h, next neighbour to
+        # try, and the pattern value replaced by the move into this depth
+        blanks = [layout.blank(state.hash)]
+        hs = [h0]
+        nexts = [0]
+        saved_p = [-1]
+        saved_v = [0]
+        del moves[:]
+        expanded += 1
+
+        while blanks:
+            b = blanks[-1]
+            i = nexts[-1]
+            nbrs = neighbours[b]
+            if i == len(nbrs):
+                # all children tried: unmake the move that led here
+                blanks.pop()
+                hs.pop()
+                nexts.pop()
+                p = saved_p.pop()
+                v = saved_v.pop()
+                if moves:
+                    moves.pop()
+                    prev = blanks[-1]
+                    tile = board[prev]
+                    board[b] = tile
+                    board[prev] = 0
+                    where[tile] = b
+                    where[0] = prev
+                    if p >= 0:
+                        pvals[p] = v
+                continue
+            nexts[-1] = i + 1
+            m, dest = nbrs[i]
+            if moves and m == OPPOSITE[moves[-1]]:
+                continue
+
+            generated += 1
+            if deadline is not None and not generated & 4095 and time.perf_counter() > deadline:
+                status = "timeout"
+                break
+            h = hs[-1]
+            tile = board[dest]
+            p = -1
+            if tile_pattern is None:
+                row = distance[tile]
+                ch = h + row[b] - row[dest]
+            else:
+                p = tile_pattern[tile]
+                if p is None:
+                    p = -1
+                    ch = h
+                else:
+                    where[tile] = b
+                    new = lookup(p, where)
+                    where[tile] = dest
+                    ch = h - pvals[p] + new
+
+            f = len(moves) + 1 + ch
+            if f > threshold:
+                if f < next_threshold:
+                    next_threshold = f
+                continue
+
+            # make the move in place
+            board[b] = tile
+            board[dest] = 0
+            where[tile] = b
+            where[0] = dest
+            if p >= 0:
+                saved_v.append(pvals[p])
+                pvals[p] = new
+            else:
+                saved_v.append(0)
+            saved_p.append(p)
+            moves.append(m)
+            blanks.append(dest)
+            hs.append(ch)
+            nexts.append(0)
+            expanded += 1
+
+            if ch == 0 and board == goal_board:
+                found = True
+                break
+
+        iterations.append((threshold, expanded))
+        if status == "timeout":
+            break
+        if not found:
+            # no solution has a length of the other parity
+            threshold = next_threshold + ((next_threshold - parity) & 1)
+
+    stats = dict(iterations=iterations,
+                 expanded=sum(e for t, e in iterations),
+                 generated=generated,
+                 elapsed=time.perf_counter() - started)
+    if found:
+        return SearchResult(state.hash, layout, list(moves), **stats)
+    return SearchResult(state.hash, layout, None, status, **stats)
+
+
+def run(state, heuristic=None):
+    result = search(state, heuristic)
+    for threshold, expanded in result.stats["iterations"]:
+        print ("threshold: " + str(threshold) + " : " + "nodes expanded: " + str(expanded))
+    if result.solved:
+        print ("number of solution steps: " + str(result.cost))
+        for board in result.path():
+            print (board)
+    else:
+        print ("Search failed")
+
+## =================================================================
+
+if __name__ == '__main__':
+    from FifteenPuzzle import FifteenPuzzle
+    from EightPuzzle import EightPuzzle
+
+    puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3))
+    state = EightPuzzle(puzzle)
+
+    run(state)
@@ -1,40 +1,32 @@
-from FifteenPuzzle import FifteenPuzzle
-from EightPuzzle import EightPuzzle
 from Solution import solution
+from Solvability import puzzleIsSolvable
 
-try:
-    import Queue as Q  # ver. < 3.0
-except ImportError:
-    import queue as Q
-
-frontier = Q.LifoQueue()
-frontier_metrics = dict()
-visited_hashes = dict()
-
-class Node:
-
-    def __init__(self, state, parent):
-        self.parent = parent
-        self.state = state
-        self.G = 0
-        self.metric = self.G + state.heuristic()
+# the stack and tables hold packed ints, never puzzle objects; a plain
+# list is the stack, and each state keeps only the move that reached it
+frontier = []
+move_table = None
+visited_hashes = set()
+puzzle_state = None
+heuristic = None
 
 def IDFS(limit):
     return RIDFS(limit)
 
 
 def RIDFS(limit):
-    if frontier.empty():
+    if not frontier:
         return "failure"
-    # get next un-visited node in stack
-    u_node = frontier.get()[1]
-    while visited_hashes.has_key(u_node.state.hash):
-        u_node = frontier.get()[1]
-    # u_node.state.toPrint()
-    visited_hashes[u_node.state.hash] = True
-
-    if u_node.state.goal_test():
-        return solution(u_node)
+    # get next un-visited state in stack
+    u_state = frontier.pop()
+    while u_state in visited_hashes:
+        if not frontier:
+            return "failure"
+        u_state = frontier.pop()
+    visited_hashes.add(u_state)
+
+    layout = puzzle_state.layout
+    if heuristic.isGoal(u_state):
+        return solution(layout, move_table, u_state, puzzle_state.hash)
     
     if limit == 0:
         cutoff_occurred = True
@@ -43,12 +35,14 @@ def RIDFS(limit):
     # else look athe chilren
     cutoff_occurred = False
     
-    # gather up the children and push them onto the stack
-    # gather up the children
-    child_nodes = [Node(p, u_node) for p in u_node.state.children()]
-    for c in child_nodes:
-        frontier.put((c.metric, c))
-        #print "child" + str(c.state.puzzle)
+    # gather up the children and push them onto the stack, worst first so
+    # the child with the smallest heuristic is explored next
+    children = [(heuristic.h(child), move, child) for move, child in layout.successors(u_state)
+                if child not in visited_hashes]
+    children.sort(reverse=True)
+    for h, move, child in children:
+        move_table[child] = move
+        frontier.append(child)
                 
     result = RIDFS(limit-1)
     if result == "cutoff":
@@ -63,17 +57,34 @@ def RIDFS(limit):
         
             
 
-def run(state, limit):
-    root_node = Node(state, False)
-    frontier.put((root_node.metric, root_node))
-    frontier_metrics[root_node.state.hash] = root_node.metric
-
-    print state.puzzle
+def run(state, limit, engine=None):
+    """Depth-limited search from state; engine is the heuristic used to order
+    children (Manhattan by default, or a PatternDatabase).  Returns the
+    solution as a string of blank moves, or "cutoff" / "failure"."""
+    global puzzle_state, heuristic, move_table
+    puzzle_state = state
+    heuristic = state.manhattan if engine is None else engine
+
+    # start from empty tables: nothing carries over from a previous run
+    del frontier[:]
+    move_table = dict()
+    visited_hashes.clear()
+    frontier.append(state.hash)
+
+    print (state.puzzle)
+    if not puzzleIsSolvable(state):
+        print ("Puzzle is not solvable")
+        return
     solution = IDFS(limit)
+    print (solution)
+    return solution
     
     ## =================================================================
 
 if __name__ == '__main__':
+    from FifteenPuzzle import FifteenPuzzle
+    from EightPuzzle import EightPuzzle
+
     #puzzle = ((14, 13, 11, 15), (4, 1, 6, 10), (12, 16, 8, 7), (9, 5, 3, 2))
     #state = FifteenPuzzle(puzzle)
 
@@ -0,0 +1,119 @@
+INFINITY = float("inf")
+
+# the searches key their heaps on f * KEY_SCALE - g: smallest f first,
+# ties toward higher g (g stays below KEY_SCALE)
+KEY_SCALE = 1 << 12
+
+
+class IndexedHeap:
+    """Binary min-heap of hashable items with decrease-key.
+
+    Unlike queue.PriorityQueue there is no lock, at most one entry per
+    item, and items are never compared with each other: only their keys.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.items = []
+        self.index = dict()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def key(self, item):
+        return self.keys[self.index[item]]
+
+    def push(self, item, key):
+        """Add a new item"""
+        self.keys.append(key)
+        self.items.append(item)
+        self.index[item] = len(self.items) - 1
+        self._up(len(self.items) - 1)
+
+    def decrease(self, item, key):
+        """Lower the key of an item already in the heap"""
+        i = self.index[item]
+        if key < self.keys[i]:
+            self.keys[i] = key
+            self._up(i)
+
+    def pushOrDecrease(self, item, key):
+        if item in self.index:
+            self.decrease(item, key)
+        else:
+            self.push(item, key)
+
+    def peekKey(self):
+        return self.keys[0]
+
+    def pop(self):
+        """Remove and return (item, key) with the smallest key"""
+        keys = self.keys
+        items = self.items
+        item = items[0]
+        key = keys[0]
+        del self.index[item]
+        last_item = items.pop()
+        last_key = keys.pop()
+        if items:
+            items[0] = last_item
+            keys[0] = last_key
+            self.index[last_item] = 0
+            self._down(0)
+        return item, key
+
+    def remove(self, item):
+        """Drop an item wherever it sits in the heap"""
+        i = self.index.pop(item)
+        last_item = self.items.pop()
+        last_key = self.keys.pop()
+        if i < len(self.items):
+            self.items[i] = last_item
+            self.keys[i] = last_key
+            self.index[last_item] = i
+            self._up(i)
+            self._down(self.index[last_item])
+
+    def _up(self, i):
+        keys = self.keys
+        items = self.items
+        index = self.index
+        key = keys[i]
+        item = items[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[parent] <= key:
+                break
+            keys[i] = keys[parent]
+            items[i] = items[parent]
+            index[items[i]] = i
+            i = parent
+        keys[i] = key
+        items[i] = item
+        index[item] = i
+
+    def _down(self, i):
+        keys = self.keys
+        items = self.items
+        index = self.index
+        n = len(items)
+        key = keys[i]
+        item = items[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[child + 1] < keys[child]:
+                child += 1
+            if keys[child] >= key:
+                break
+            keys[i] = keys[child]
+            items[i] = items[child]
+            index[items[i]] = i
+            i = child
+        keys[i] = key
+        items[i] = item
+        index[item] = i
@@ -0,0 +1,127 @@
+"""Vectorized successor generation for whole frontier layers.
+
+States are handled as uint64 board keys: the packed board of PackedState
+without the blank field (the blank is the cell holding 0), which fits in
+64 bits up to 4x4.  expand() takes an array of keys and returns all of
+their successors as one array, using the blank-neighbour tables of the
+layout as fancy-index tables, so a layer of millions of states is
+expanded without touching a Python object per state.
+
+    expander = LayerExpander.forSize(3)
+    children, parents, moves = expander.expand(layer)
+"""
+
+import numpy as np
+
+from PackedState import PackedBoard
+
+
+class LayerExpander:
+    """Array move tables for one board size"""
+
+    _expanders = dict()
+
+    @classmethod
+    def forSize(cls, N):
+        expander = cls._expanders.get(N)
+        if expander is None:
+            expander = cls._expanders[N] = cls(N)
+        return expander
+
+    def __init__(self, N):
+        self.layout = layout = PackedBoard.forSize(N)
+        assert layout.blank_shift <= 64, "Board keys only fit 64 bits up to 4x4"
+        self.N = N
+        self.mask = np.uint64(layout.mask)
+        self.shifts = np.array(layout.shifts, dtype=np.uint64)
+        # weight of each cell's Lehmer digit: (cells - 1 - i)!
+        self.weights = np.ones(layout.cells, dtype=np.int64)
+        for i in range(layout.cells - 2, -1, -1):
+            self.weights[i] = self.weights[i + 1] * (layout.cells - 1 - i)
+        # dest[cell, move]: where the blank goes, -1 if it would leave the board
+        self.dest = np.full((layout.cells, 4), -1, dtype=np.int64)
+        for cell, moves in enumerate(layout.neighbours):
+            for m, d in moves:
+                self.dest[cell, m] = d
+
+    def toKeys(self, states):
+        """uint64 keys from packed states"""
+        board_mask = self.layout.board_mask
+        return np.array([s & board_mask for s in states], dtype=np.uint64)
+
+    def fromKeys(self, keys):
+        """Packed states (with blank field) from uint64 keys"""
+        shift = self.layout.blank_shift
+        blanks = self.blanks(keys).tolist()
+        return [k | (b << shift) for k, b in zip(keys.tolist(), blanks)]
+
+    def cellValues(self, keys):
+        """(M, cells) array of the tile in every cell (0 for the blank)"""
+        return (keys[:, None] >> self.shifts) & self.mask
+
+    def blanks(self, keys):
+        """Blank cell of every key"""
+        return np.argmax(self.cellValues(keys) == 0, axis=1)
+
+    def ranks(self, keys):
+        """Lehmer rank of every key's cell values (blank as 0): a perfect
+        index into the N*N! permutations"""
+        cells = self.layout.cells
+        values = self.cellValues(keys).astype(np.int64)
+        smaller = (values[:, None, :] < values[:, :, None]) & np.tri(cells, k=-1, dtype=bool)
+        return ((values - smaller.sum(axis=2)) * self.weights).sum(axis=1)
+
+    def expand(self, keys, blanks=None):
+        """All successors of an array of keys.
+
+        Returns (children, parents, moves): children[i] is reached from
+        keys[parents[i]] by moves[i] (PackedState move codes).
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if blanks is None:
+            blanks = self.blanks(keys)
+        index = np.arange(len(keys))
+        children = []
+        parents = []
+        moves = []
+        for m in range(4):
+            dest = self.dest[blanks, m]
+            ok = dest >= 0
+            src = keys[ok]
+            d_shift = self.shifts[dest[ok]]
+            b_shift = self.shifts[blanks[ok]]
+            tile = (src >> d_shift) & self.mask
+            children.append((src ^ (tile << d_shift)) | (tile << b_shift))
+            parents.append(index[ok])
+            moves.append(np.full(len(src), m, dtype=np.uint8))
+        return np.concatenate(children), np.concatenate(parents), np.concatenate(moves)
+
+    def nextLayer(self, layer, previous=None):
+        """Sorted unique successors of a sorted layer that are not in the
+        layer itself or the one before it (breadth-first frontier search
+        only needs the last two layers for duplicate detection)"""
+        children = np.unique(self.expand(layer)[0])
+        children = children[~np.isin(children, layer, assume_unique=True)]
+        if previous is not None:
+            children = children[~np.isin(children, previous, assume_unique=True)]
+        return children
+
+
+def bfsLayers(start, N):
+    """Yield the sorted key array of every BFS layer from one packed state"""
+    expander = LayerExpander.forSize(N)
+    previous = None
+    layer = expander.toKeys([start])
+    while len(layer):
+        yield layer
+        layer, previous = expander.nextLayer(layer, previous), layer
+
+## =================================================================
+
+if __name__ == '__main__':
+    from NPuzzle import NPuzzle, standardGoal
+
+    start = NPuzzle(standardGoal(3)).hash
+    sizes = [len(layer) for layer in bfsLayers(start, 3)]
+    print ("layers: " + str(len(sizes)) + " : " + "states: " + str(sum(sizes)))
+    print (sizes)
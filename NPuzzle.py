@@ -1,69 +1,104 @@
-import numpy as np
-import random as r
-from itertools import compress
+from PackedState import PackedBoard
+from Heuristics import Manhattan
+
+
+def standardGoal(N):
+    """Tiles 1..N*N-1 in row-major order with the blank (N*N) last"""
+    return tuple(tuple(r * N + c + 1 for c in range(N)) for r in range(N))
+
+
+def korfGoal(N):
+    """Goal of Korf's instance files: blank first, then 1, 2, ..."""
+    return tuple(tuple(r * N + c or N * N for c in range(N)) for r in range(N))
 
 
 class NPuzzle:
+    """N x N sliding-tile puzzle of any size, against any goal.
+
+    All per-size tables (packed layout, blank neighbours) and per-goal
+    tables (goal positions, Manhattan distances) are built once and
+    cached, so instances only carry their packed state and h.  Children
+    are created on the packed state without re-validating or unpacking.
+    """
+
+    goal = None     # subclasses fix a goal; None means standardGoal(N)
+
+    def __init__(self, puzzle, h=None, goal=None):
+
+        self.N = len(puzzle)
+        self.blank = self.N * self.N
+        if goal is None:
+            goal = type(self).goal or standardGoal(self.N)
+        self.goal = tuple(map(tuple, goal))
+
+        self._puzzle = self.validatePuzzle(tuple(map(tuple, puzzle)))
+        self.layout = PackedBoard.forSize(self.N)
+        self.hash = self.layout.pack(self._puzzle)
+        self.manhattan = Manhattan.forGoal(self.goal)
+        # children pass in their parent's h plus the moved tile's delta
+        self.h = self.manhattan.h(self.hash) if h is None else h
+
+    def _child(self, packed, h):
+        """Child sharing this puzzle's tables; the board is unpacked lazily"""
+        child = object.__new__(type(self))
+        child.N = self.N
+        child.blank = self.blank
+        child.goal = self.goal
+        child.layout = self.layout
+        child.manhattan = self.manhattan
+        child.hash = packed
+        child.h = h
+        child._puzzle = None
+        return child
+
+    @property
+    def puzzle(self):
+        if self._puzzle is None:
+            self._puzzle = self.layout.unpack(self.hash)
+        return self._puzzle
+
+    @property
+    def tiles(self):
+        return range(1, self.blank)
+
+    @property
+    def movable_tiles(self):
+        return self.movables()
+
+    def setGoal(self, goal):
+        """Search toward a different goal board"""
+        self.goal = tuple(map(tuple, goal))
+        self.validatePuzzle(self.goal)
+        self.manhattan = Manhattan.forGoal(self.goal)
+        self.h = self.manhattan.h(self.hash)
 
-    goal = [[1,2,3,4],[5,6,7,8],[9,10,11,12],[13,14,15,16]]
-    blank = 16
-    N = 0
-    tiles = []
-    visited_puzzles = []
-    
-    
-    def __init__(self, puzzle):
-        
-        NPuzzle.N = len(puzzle)
-        n_tiles = NPuzzle.N * NPuzzle.N
-        NPuzzle.tiles = [x + 1 for x in range(n_tiles)][:n_tiles-1]
-        
-        self.puzzle = self.validatePuzzle(puzzle)        
-        self.movable_tiles = self.movables()
-
-    def setGoal(self):
-        
-        NPuzzle.goal = goal
-                
     def validatePuzzle(self, puzzle):
         """confirm puzzle satisfies necessary criteria, listed below"""
-        
+
         # more than one row
         assert len(puzzle) > 1, "Puzzle has fewer than 2 rows"
-        
+
         # squareness
-        isSquare = True
         n_row = len(puzzle)
-        for n in range(n_row):
-            if len(puzzle[n]) != n_row:
-                is_square = False
-                break
+        isSquare = all(len(row) == n_row for row in puzzle)
         assert isSquare, "Puzzle is not square"
-            
+
         # continguous and distinct
-        indArray = np.array([0 for i in range(NPuzzle.N * NPuzzle.N)])
-        
-        for n in range(NPuzzle.N): #0,1,2,3
-            for c in puzzle[n]:
-                indArray[c-1] = 1
-        if all(indArray):
-            return puzzle
-        assert all(indArray), "Puzzle has missing or duplicate tiles"
-            
+        tiles = sorted(t for row in puzzle for t in row)
+        assert tiles == list(range(1, n_row * n_row + 1)), "Puzzle has missing or duplicate tiles"
+        return puzzle
+
     def toPrint(self):
         """Simple print puzzle"""
-        print self.puzzle
+        print (self.puzzle)
 
     def find_row(self, puzzle, tile):
         """Find which row the tile is in. Row numbers start at '1'."""
-        res = False
-        for r in range(NPuzzle.N):
+        for r in range(self.N):
             if tile in puzzle[r]:
-                res = r+1
-                break
-        if res > NPuzzle.N:
-            print "can't find tile in puzzle"
-        return res
+                return r + 1
+        print ("can't find tile in puzzle")
+        return False
 
     def find_col(self, puzzle, tile):
         """find which column the tile is in."""
@@ -72,53 +107,56 @@ class NPuzzle:
 
     def tile_distance(self, tile):
         """Compute manhattan distance one out of place tile"""
-        return abs(self.find_row(NPuzzle.goal, tile) - self.find_row(self.puzzle, tile)) + \
-               abs(self.find_col(NPuzzle.goal, tile) - self.find_col(self.puzzle, tile))
+        return abs(self.find_row(self.goal, tile) - self.find_row(self.puzzle, tile)) + \
+               abs(self.find_col(self.goal, tile) - self.find_col(self.puzzle, tile))
 
     def distance_between(self, tile1, tile2):
         """Compute manhattan distance between two tiles"""
         return abs(self.find_row(self.puzzle, tile1) - self.find_row(self.puzzle, tile2)) + \
                abs(self.find_col(self.puzzle, tile1) - self.find_col(self.puzzle, tile2))
-               
+
     def heuristic(self):
-        """Compute total manhattan distances of all out of place tiles"""
-        return sum(map(self.tile_distance, NPuzzle.tiles))
+        """Total manhattan distances of all out of place tiles"""
+        return self.h
 
     def goal_test(self):
         """Test if goal has been reached"""
-        return self.heuristic() == 0
+        return self.manhattan.isGoal(self.hash)
 
     def movables(self):
         """Produce list of tiles that can change places with the blank"""
-        movable_tiles = []
-        for t in NPuzzle.tiles:
-            if self.distance_between(t, NPuzzle.blank) == 1:
-                movable_tiles.append(t)
-        return movable_tiles
+        layout = self.layout
+        return [layout.tile(self.hash, dest) for move, dest in layout.neighbours[layout.blank(self.hash)]]
 
     def getTileIndex(self, tile):
         """Returns tuple with (row, col) index of tile"""
-        temp_puzzle = np.array(self.puzzle)
-        index = np.transpose(np.array(np.where(temp_puzzle == tile)))[0]
-        return (index[0],index[1])
+        return (self.find_row(self.puzzle, tile) - 1, self.find_col(self.puzzle, tile) - 1)
 
     def swapTiles(self, tile1, tile2):
         """Produce a puzzle that has the two tiles swapped"""
         assert self.distance_between(tile1, tile2) == 1, "Trying to swap two tiles that are too far apart"
-        temp_puzzle = np.array(self.puzzle)
-
-        tindex1 = self.getTileIndex(tile1)
-        tindex2 = self.getTileIndex(tile2)
-        temp_puzzle[tindex1] = tile2
-        temp_puzzle[tindex2] = tile1
-        return tuple(map(tuple, temp_puzzle))
+        swap = {tile1: tile2, tile2: tile1}
+        return tuple(tuple(swap.get(t, t) for t in row) for row in self.puzzle)
 
     def possiblePuzzles(self):
-        return [self.swapTiles(t1, NPuzzle.blank) for t1 in self.movable_tiles]
+        return [self.layout.unpack(s) for m, s in self.layout.successors(self.hash)]
 
     def children(self):
-        return [NPuzzle(p) for p in self.possiblePuzzles()]           
-            
+        layout = self.layout
+        packed = self.hash
+        delta = self.manhattan.delta
+        return [self._child(layout.move(packed, dest), self.h + delta(packed, dest))
+                for move, dest in layout.neighbours[layout.blank(packed)]]
+
+    def scoredChildren(self, kernel="linearConflict"):
+        """(child, score) pairs with every successor scored in one call of a
+        HeuristicKernels kernel ("manhattan", "linearConflict" or
+        "walkingDistance"); child.heuristic() stays Manhattan"""
+        from HeuristicKernels import Kernels, packedArray
+        children = self.children()
+        scores = getattr(Kernels.forGoal(self.goal), kernel)(packedArray([c.hash for c in children], self.N))
+        return list(zip(children, scores.tolist()))
+
 # ===================================================================================
 
 if __name__ == '__main__':
@@ -130,13 +168,11 @@ if __name__ == '__main__':
 ##    print ep.possiblePuzzles()
 
     mp = NPuzzle(puzzle)
-    print NPuzzle.goal
+    print (mp.goal)
     mp.setGoal(((5, 1, 3, 4), (2, 6, 8, 12), (16, 10, 7, 11), (9, 13, 15, 14)))
-    print NPuzzle.goal
-    print ep.goal
-    
-   
-    
-
-    
-    
+    print (mp.goal)
+    print (ep.goal)
+
+    # the same engine runs any size
+    print (NPuzzle(((1, 2, 3, 4, 5), (6, 7, 8, 9, 10), (11, 12, 13, 14, 15),
+                    (16, 17, 18, 19, 20), (21, 22, 23, 25, 24))).heuristic())
@@ -0,0 +1,164 @@
+"""Exact optimal-move table for the whole 8-puzzle.
+
+One breadth-first sweep from the goal (EightPuzzle.goal by default)
+reaches all 9!/2 solvable boards.  Every board gets one byte, indexed by
+its permutation rank (blank as 0): the optimal distance in the low five
+bits (the deepest 3x3 board is 31 moves) and a blank move that goes one
+step closer to the goal in the two bits above.  Boards of the other
+parity keep UNSEEN.  The file is those 9! bytes behind a small header,
+about 355 KB, and is memory-mapped when loaded, so solving a board is a
+walk of rank-and-look-up steps with no search at all.
+
+    python Oracle.py oracle-3x3.bin         # build once
+    oracle = Oracle("oracle-3x3.bin")
+    oracle.solve(((9, 4, 8), (6, 1, 2), (7, 5, 3)))    # [3, 1, 2, 0, ...]
+
+An Oracle also has the h/delta/isGoal/goal_state engine interface, with
+the true distance as h, for the searches that only go through it
+(Astar, ARAstar, BoundedAstar); IDAstar is specialised to Manhattan and
+pattern-database tables and does not take it.
+"""
+
+import mmap
+import struct
+import sys
+import time
+
+import numpy as np
+
+from LayerExpansion import LayerExpander, bfsLayers
+from NPuzzle import NPuzzle, standardGoal
+from PackedState import OPPOSITE, PackedBoard
+from Solution import SearchResult, permutationRank
+
+MAGIC = b"NPOR"
+VERSION = 1
+UNSEEN = 255
+DISTANCE_BITS = 5
+DISTANCE_MASK = (1 << DISTANCE_BITS) - 1
+
+
+def build(path, goal=None):
+    """Sweep the whole 3x3 space from goal and write the table to path"""
+    goal = tuple(map(tuple, goal or standardGoal(3)))
+    assert len(goal) == 3, "The oracle covers 3x3 boards only"
+    expander = LayerExpander.forSize(3)
+    cells = expander.layout.cells
+    size = 1
+    for n in range(2, cells + 1):
+        size *= n
+    table = np.full(size, UNSEEN, dtype=np.uint8)
+    opposite = np.array(OPPOSITE, dtype=np.uint8)
+
+    previous = None
+    for depth, layer in enumerate(bfsLayers(NPuzzle(goal).hash, 3)):
+        assert depth <= DISTANCE_MASK, "Distance does not fit the table byte"
+        if previous is None:
+            table[expander.ranks(layer)] = 0
+        else:
+            # each board of the layer steps back to a parent in the previous one
+            children, parents, moves = expander.expand(previous)
+            order = np.argsort(children, kind="stable")
+            children, moves = children[order], moves[order]
+            found = np.searchsorted(children, layer)
+            back = opposite[moves[found]]
+            table[expander.ranks(layer)] = depth | (back << DISTANCE_BITS)
+        previous = layer
+
+    header = MAGIC + struct.pack("<BB", VERSION, 3) + bytes(t for row in goal for t in row)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(table.tobytes())
+
+
+class Oracle:
+    """Memory-mapped optimal distance and move of every 3x3 board"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.data
+        assert data[:4] == MAGIC, "Not an oracle file"
+        version, N = struct.unpack_from("<BB", data, 4)
+        assert version == VERSION, "Unsupported oracle version"
+
+        self.N = N
+        self.layout = PackedBoard.forSize(N)
+        cells = self.layout.cells
+        flat = data[6:6 + cells]
+        self.goal = tuple(tuple(flat[r * N:(r + 1) * N]) for r in range(N))
+        self.goal_state = self.layout.pack(self.goal)
+        self.offset = 6 + cells
+
+    def entry(self, state):
+        """Table byte of a packed state"""
+        return self.data[self.offset + permutationRank(self.layout, state)]
+
+    def cost(self, state):
+        """Optimal number of moves to the goal, None if unsolvable"""
+        e = self.entry(state)
+        return None if e == UNSEEN else e & DISTANCE_MASK
+
+    def moves(self, state):
+        """Optimal blank moves from a packed state, None if unsolvable"""
+        layout = self.layout
+        data = self.data
+        offset = self.offset
+        e = data[offset + permutationRank(layout, state)]
+        if e == UNSEEN:
+            return None
+        moves = []
+        while e & DISTANCE_MASK:
+            m = e >> DISTANCE_BITS
+            moves.append(m)
+            state = layout.apply(state, m)
+            e = data[offset + permutationRank(layout, state)]
+        return moves
+
+    def solve(self, puzzle):
+        """Optimal blank moves for a board given as rows of tiles"""
+        return self.moves(self.layout.pack(tuple(map(tuple, puzzle))))
+
+    def search(self, state, heuristic=None, time_limit=None):
+        """SearchResult for an NPuzzle state, like the search modules"""
+        started = time.perf_counter()
+        assert state.goal == self.goal, "The oracle was built for another goal"
+        moves = self.moves(state.hash)
+        stats = dict(expanded=0 if moves is None else len(moves),
+                     elapsed=time.perf_counter() - started)
+        if moves is None:
+            return SearchResult(state.hash, self.layout, None, "unsolvable", **stats)
+        return SearchResult(state.hash, self.layout, moves, **stats)
+
+    # -- heuristic engine --------------------------------------------------------------
+
+    def h(self, state):
+        """Exact distance (UNSEEN boards never reach a search)"""
+        return self.entry(state) & DISTANCE_MASK
+
+    def delta(self, state, dest):
+        """Change in h when the tile in cell dest slides into the blank"""
+        return self.h(self.layout.move(state, dest)) - self.h(state)
+
+    def isGoal(self, state):
+        """O(1) goal test"""
+        return state == self.goal_state
+
+## =================================================================
+
+if __name__ == '__main__':
+    import os
+
+    # python Oracle.py <table file>      (built first if missing)
+    path = sys.argv[1] if len(sys.argv) > 1 else "oracle-3x3.bin"
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        build(path)
+        print ("built: " + path + " : " + "%.2fs" % (time.perf_counter() - started))
+    oracle = Oracle(path)
+    puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3))
+    started = time.perf_counter()
+    for i in range(1000):
+        moves = oracle.solve(puzzle)
+    per_solve = (time.perf_counter() - started) / 1000
+    print ("steps: " + str(len(moves)) + " : " + "per solve: %.1fus" % (per_solve * 1e6))
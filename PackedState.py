@@ -0,0 +1,109 @@
+"""Packed integer representation of N-tile puzzle boards.
+
+A board is packed into one int.  Cell i (row-major) occupies `bits` bits
+starting at bit i*bits and holds its tile number, with the blank stored
+as 0.  The blank's cell index is kept in the bits above the board, so a
+state is a single plain int that hashes and compares in O(1) and a move
+is a handful of shifts and masks.
+"""
+
+# moves are named by the direction the blank travels
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+MOVE_NAMES = "UDLR"
+OPPOSITE = (DOWN, UP, RIGHT, LEFT)
+
+
+class PackedBoard:
+    """Bit layout and move tables for one board size"""
+
+    _layouts = dict()
+
+    @classmethod
+    def forSize(cls, N):
+        """Return the (cached) layout for an N x N board"""
+        layout = cls._layouts.get(N)
+        if layout is None:
+            layout = cls._layouts[N] = cls(N)
+        return layout
+
+    def __init__(self, N):
+        self.N = N
+        self.cells = N * N
+        # 4 bits per cell up to 4x4, wider fields for larger boards
+        self.bits = max(1, (self.cells - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.blank_shift = self.cells * self.bits
+        self.board_mask = (1 << self.blank_shift) - 1
+        self.shifts = tuple(c * self.bits for c in range(self.cells))
+        self.neighbours = tuple(self._neighbours(c) for c in range(self.cells))
+
+    def _neighbours(self, cell):
+        """(move, destination cell) pairs for a blank sitting in cell"""
+        r, c = divmod(cell, self.N)
+        result = []
+        if r > 0:
+            result.append((UP, cell - self.N))
+        if r < self.N - 1:
+            result.append((DOWN, cell + self.N))
+        if c > 0:
+            result.append((LEFT, cell - 1))
+        if c < self.N - 1:
+            result.append((RIGHT, cell + 1))
+        return tuple(result)
+
+    def pack(self, puzzle):
+        """Pack a tuple-of-tuples board (blank == N*N) into an int"""
+        state = 0
+        blank = None
+        cell = 0
+        for row in puzzle:
+            for tile in row:
+                if tile == self.cells:
+                    blank = cell
+                else:
+                    state |= tile << self.shifts[cell]
+                cell += 1
+        assert blank is not None, "Puzzle has no blank"
+        return state | (blank << self.blank_shift)
+
+    def unpack(self, state):
+        """Rebuild the tuple-of-tuples board from a packed state"""
+        flat = [(state >> s) & self.mask or self.cells for s in self.shifts]
+        return tuple(tuple(flat[r * self.N:(r + 1) * self.N]) for r in range(self.N))
+
+    def blank(self, state):
+        """Cell index of the blank"""
+        return state >> self.blank_shift
+
+    def tile(self, state, cell):
+        """Tile in cell (0 for the blank)"""
+        return (state >> self.shifts[cell]) & self.mask
+
+    def move(self, state, dest):
+        """Slide the tile in cell dest into the blank"""
+        shift = self.shifts[dest]
+        tile = (state >> shift) & self.mask
+        board = (state & self.board_mask) ^ (tile << shift)
+        board |= tile << self.shifts[state >> self.blank_shift]
+        return board | (dest << self.blank_shift)
+
+    def apply(self, state, move):
+        """Apply a named move; None if it would leave the board"""
+        for m, dest in self.neighbours[state >> self.blank_shift]:
+            if m == move:
+                return self.move(state, dest)
+        return None
+
+    def successors(self, state):
+        """List of (move, child state) pairs"""
+        move = self.move
+        return [(m, move(state, dest)) for m, dest in self.neighbours[state >> self.blank_shift]]
+
+    def moveBetween(self, parent, child):
+        """Move that turns parent into an adjacent child state"""
+        step = (child >> self.blank_shift) - (parent >> self.blank_shift)
+        if step == -self.N:
+            return UP
+        if step == self.N:
+            return DOWN
+        return LEFT if step == -1 else RIGHT
@@ -0,0 +1,231 @@
+"""Disjoint additive pattern databases.
+
+Each pattern is a group of tiles.  Its table holds, for every placement
+of those tiles, the fewest moves *of pattern tiles* needed to bring them
+home, found by a retrograde 0-1 BFS from the goal in which moves of the
+other tiles are free.  Because no move is counted by two patterns, the
+table values of a disjoint partition can be added and stay admissible.
+A partition holding every tile (the 3x3 "full" set) is an exact table.
+
+The tables are stored as raw bytes behind a small fixed header and are
+memory-mapped when loaded, so opening a database costs no parsing and
+worker processes share the pages through the OS cache.
+"""
+
+import mmap
+import struct
+import sys
+from collections import deque
+
+from PackedState import PackedBoard
+
+MAGIC = b"NPDB"
+VERSION = 1
+UNSEEN = 255
+
+# tile groups for the standard goal (tiles 1..N*N-1 in row-major order).
+# build_table is a pure-Python BFS over a working table of
+# table_size(cells, k) * cells bytes: the 3x3 "full" set takes seconds,
+# each 6-tile pattern of "663" about 16!/10! * 16 = 92 MB and half an hour.
+# A 7- or 8-tile pattern (16!/8! * 16 = 8.3 GB) is out of reach this way,
+# so no "78" partition is offered.
+PARTITIONS = {
+    3: {"full": ((1, 2, 3, 4, 5, 6, 7, 8),)},
+    4: {"663": ((1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4))},
+}
+
+
+def korfPartition(partition, N):
+    """A standard-goal partition carried over to korfGoal(N), which is the
+    standard goal turned 180 degrees: tile t's home becomes tile N*N - t's"""
+    return tuple(tuple(N * N - t for t in tiles) for tiles in partition)
+
+
+def table_size(cells, k):
+    """Number of placements of k distinct tiles on cells cells"""
+    size = 1
+    for i in range(k):
+        size *= cells - i
+    return size
+
+
+def rank(positions, cells):
+    """Perfect index of a placement of distinct cells, 0 <= rank < table_size"""
+    result = 0
+    for i, p in enumerate(positions):
+        smaller = 0
+        for q in positions[:i]:
+            if q < p:
+                smaller += 1
+        result = result * (cells - i) + p - smaller
+    return result
+
+
+def build_table(goal, tiles):
+    """Retrograde 0-1 BFS for one pattern; returns a bytearray of distances"""
+    N = len(goal)
+    layout = PackedBoard.forSize(N)
+    cells = layout.cells
+    flat = [t for row in goal for t in row]
+    start = tuple(flat.index(t) for t in tiles)
+    start_blank = flat.index(cells)
+
+    dist = bytearray([UNSEEN]) * (table_size(cells, len(tiles)) * cells)
+    dist[rank(start, cells) * cells + start_blank] = 0
+    queue = deque([(start, start_blank, 0)])
+    while queue:
+        positions, blank, d = queue.popleft()
+        if dist[rank(positions, cells) * cells + blank] < d:
+            continue
+        for move, dest in layout.neighbours[blank]:
+            if dest in positions:
+                # a pattern tile slides into the blank: costs one move
+                j = positions.index(dest)
+                child = positions[:j] + (blank,) + positions[j + 1:]
+                nd = d + 1
+            else:
+                child = positions
+                nd = d
+            key = rank(child, cells) * cells + dest
+            if nd < dist[key]:
+                dist[key] = nd
+                if nd == d:
+                    queue.appendleft((child, dest, nd))
+                else:
+                    queue.append((child, dest, nd))
+
+    # the heuristic does not know where the blank is: keep the minimum
+    table = bytearray(len(dist) // cells)
+    for r in range(len(table)):
+        table[r] = min(dist[r * cells:(r + 1) * cells])
+    return table
+
+
+def build(goal, partition, path):
+    """Build every pattern of a partition and write them to path"""
+    goal = tuple(map(tuple, goal))
+    N = len(goal)
+    tables = [build_table(goal, tiles) for tiles in partition]
+
+    header = MAGIC + struct.pack("<BBB", VERSION, N, len(partition))
+    header += bytes(t for row in goal for t in row)
+    for tiles in partition:
+        header += struct.pack("<B", len(tiles)) + bytes(tiles)
+    offset = len(header) + 8 * len(tables)
+    for table in tables:
+        header += struct.pack("<Q", offset)
+        offset += len(table)
+
+    with open(path, "wb") as f:
+        f.write(header)
+        for table in tables:
+            f.write(table)
+
+
+class PatternDatabase:
+    """Memory-mapped additive PDB heuristic on packed states"""
+
+    def __init__(self, path):
+        self.path = path        # so worker processes can map the same file
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.data
+        assert data[:4] == MAGIC, "Not a pattern database file"
+        version, N, n_patterns = struct.unpack_from("<BBB", data, 4)
+        assert version == VERSION, "Unsupported pattern database version"
+
+        self.N = N
+        self.layout = PackedBoard.forSize(N)
+        cells = self.layout.cells
+        pos = 7
+        flat = data[pos:pos + cells]
+        pos += cells
+        self.goal = tuple(tuple(flat[r * N:(r + 1) * N]) for r in range(N))
+        self.goal_state = self.layout.pack(self.goal)
+
+        self.patterns = []
+        for i in range(n_patterns):
+            k = data[pos]
+            self.patterns.append(tuple(data[pos + 1:pos + 1 + k]))
+            pos += 1 + k
+        self.offsets = struct.unpack_from("<%dQ" % n_patterns, data, pos)
+
+        # which pattern each tile belongs to (None for tiles left out)
+        self.tile_pattern = [None] * cells
+        for p, tiles in enumerate(self.patterns):
+            for t in tiles:
+                self.tile_pattern[t] = p
+
+        # popcount of every set of cells, and the cells below each cell,
+        # so lookup() ranks in place (up to 4x4; larger boards use rank())
+        if cells <= 16:
+            ones = bytearray([0])
+            for c in range(cells):
+                ones += bytes(n + 1 for n in ones)
+            self.ones = bytes(ones)
+        else:
+            self.ones = None
+        self.below = [(1 << c) - 1 for c in range(cells)]
+
+    def _where(self, state):
+        """Cell of every tile in a packed state"""
+        layout = self.layout
+        mask = layout.mask
+        where = [0] * layout.cells
+        for cell, shift in enumerate(layout.shifts):
+            where[(state >> shift) & mask] = cell
+        return where
+
+    def lookup(self, p, where):
+        """Table value of pattern p given the cell of every tile.  Called
+        from the IDA* inner loop, so it ranks without building a list."""
+        ones = self.ones
+        if ones is None:
+            positions = [where[t] for t in self.patterns[p]]
+            return self.data[self.offsets[p] + rank(positions, self.layout.cells)]
+        below = self.below
+        r = 0
+        seen = 0
+        n = self.layout.cells
+        for t in self.patterns[p]:
+            c = where[t]
+            r = r * n + c - ones[seen & below[c]]
+            seen |= 1 << c
+            n -= 1
+        return self.data[self.offsets[p] + r]
+
+    def h(self, state):
+        """Sum of the pattern values of a packed state"""
+        where = self._where(state)
+        return sum(self.lookup(p, where) for p in range(len(self.patterns)))
+
+    def delta(self, state, dest):
+        """Change in h when the tile in cell dest slides into the blank"""
+        layout = self.layout
+        p = self.tile_pattern[layout.tile(state, dest)]
+        if p is None:
+            return 0
+        where = self._where(state)
+        before = self.lookup(p, where)
+        where[layout.tile(state, dest)] = layout.blank(state)
+        return self.lookup(p, where) - before
+
+    def isGoal(self, state):
+        """O(1) goal test"""
+        return state == self.goal_state
+
+
+# ===================================================================================
+
+if __name__ == '__main__':
+    from NPuzzle import korfGoal, standardGoal
+
+    # python PatternDatabase.py <N> <partition name> <output file> [--korf]
+    # --korf builds for korfGoal (blank first), the goal of Korf's instances
+    N = int(sys.argv[1])
+    name = sys.argv[2]
+    path = sys.argv[3]
+    if "--korf" in sys.argv[4:]:
+        build(korfGoal(N), korfPartition(PARTITIONS[N][name], N), path)
+    else:
+        build(standardGoal(N), PARTITIONS[N][name], path)
@@ -0,0 +1,238 @@
+"""Offline tabular Q-learning for the sliding-tile puzzle.
+
+States are the uint64 board keys of LayerExpansion, so a batch of
+episodes advances together with array operations: every step picks an
+epsilon-greedy move for all of them, slides the tiles, and applies the
+Q-learning update to the whole batch at once.  Actions are blank moves
+(PackedState codes UP, DOWN, LEFT, RIGHT).
+
+The Q-table is a float32 array with one row per state: a 3x3 board's row
+is its permutation rank (9! rows, no collisions), larger boards (up to
+4x4) use a multiplicative hash of the key into 2**hash_bits rows.
+
+The reward is -1 per move plus the drop in Manhattan distance (shaping
+that leaves the best policy unchanged), and GOAL_REWARD on reaching the
+goal.  export() writes the greedy move of every row, 2 bits each, as a
+JSON policy the rl/ front end loads:
+
+    learner = QLearner(3)
+    learner.train(200000)
+    learner.export("rl/policy-3x3.json")
+"""
+
+import base64
+import json
+import time
+
+import numpy as np
+
+from Heuristics import Manhattan
+from LayerExpansion import LayerExpander
+from NPuzzle import NPuzzle, standardGoal
+from PackedState import OPPOSITE
+
+GOAL_REWARD = 100.0
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+# the front end only reads tables indexed by rank up to this many cells
+RANKED_CELLS = 9
+
+
+class QLearner:
+    """Q-table and batched trainer for one board size (standard goal)"""
+
+    def __init__(self, N=3, hash_bits=20, seed=0):
+        self.N = N
+        self.expander = expander = LayerExpander.forSize(N)
+        self.layout = layout = expander.layout
+        self.cells = cells = layout.cells
+        self.ranked = cells <= RANKED_CELLS
+        self.hash_bits = hash_bits
+        self.goal = standardGoal(N)
+        self.goal_key = expander.toKeys([NPuzzle(self.goal).hash])[0]
+        self.rng = np.random.default_rng(seed)
+
+        if self.ranked:
+            rows = 1
+            for n in range(2, cells + 1):
+                rows *= n
+        else:
+            rows = 1 << hash_bits
+        self.q = np.zeros((rows, 4), dtype=np.float32)
+        # distance[tile, cell] as an array (row 0, the blank, is all zero)
+        self.distance = np.array(Manhattan.forGoal(self.goal).distance, dtype=np.int64)
+        self.opposite = np.array(OPPOSITE)
+
+    # -- states ----------------------------------------------------------------------
+
+    def index(self, keys):
+        """Q-table row of every key"""
+        if self.ranked:
+            return self.expander.ranks(keys)
+        mixed = keys * np.uint64(HASH_MULTIPLIER)       # wraps mod 2**64
+        return (mixed >> np.uint64(64 - self.hash_bits)).astype(np.int64)
+
+    def manhattan(self, keys):
+        values = self.expander.cellValues(keys).astype(np.int64)
+        return self.distance[values, np.arange(self.cells)].sum(axis=1)
+
+    def step(self, keys, blanks, moves):
+        """Keys and blanks after blank moves (all must be legal)"""
+        expander = self.expander
+        dest = expander.dest[blanks, moves]
+        d_shift = expander.shifts[dest]
+        tile = (keys >> d_shift) & expander.mask
+        keys = (keys ^ (tile << d_shift)) | (tile << expander.shifts[blanks])
+        return keys, dest, tile.astype(np.int64)
+
+    def scramble(self, count, depth):
+        """count random walks of depth moves from the goal"""
+        keys = np.full(count, self.goal_key, dtype=np.uint64)
+        blanks = self.expander.blanks(keys)
+        for i in range(depth):
+            legal = self.expander.dest[blanks] >= 0
+            moves = self._randomLegal(legal)
+            keys, blanks, tile = self.step(keys, blanks, moves)
+        return keys, blanks
+
+    def _randomLegal(self, legal):
+        """One random legal move per row of a (M, 4) legality mask"""
+        scores = self.rng.random(legal.shape) * legal
+        return scores.argmax(axis=1)
+
+    # -- training --------------------------------------------------------------------
+
+    def train(self, episodes, batch=1024, scramble=30, max_steps=None, alpha=0.2, gamma=0.98,
+              epsilon=(1.0, 0.05), verbose=False):
+        """Run episodes from random scrambles; returns training statistics.
+
+        Each episode starts from a random walk of up to scramble moves
+        (the walk length grows over the run) and ends at the goal or after
+        max_steps moves.  epsilon decays linearly from epsilon[0] to
+        epsilon[1] over the episodes."""
+        started = time.perf_counter()
+        max_steps = max_steps or 4 * scramble
+        q = self.q
+        dest_table = self.expander.dest
+
+        def restart(count, done):
+            depth = max(1, int(scramble * min(1.0, 0.2 + done / episodes)))
+            return self.scramble(count, depth)
+
+        keys, blanks = restart(batch, 0)
+        rows = self.index(keys)
+        h = self.manhattan(keys)
+        steps = np.zeros(batch, dtype=np.int64)
+        last = np.full(batch, -1)
+        done = 0
+        solved = 0
+        solved_steps = 0
+        transitions = 0
+        while done < episodes:
+            eps = epsilon[0] + (epsilon[1] - epsilon[0]) * min(1.0, done / episodes)
+            legal = dest_table[blanks] >= 0
+            values = np.where(legal, q[rows], -np.inf)
+            greedy = values.argmax(axis=1)
+            # exploration never undoes the previous move if it has a choice
+            explore_legal = legal.copy()
+            undo = last >= 0
+            explore_legal[undo, self.opposite[last[undo]]] = False
+            explore_legal[~explore_legal.any(axis=1)] = legal[~explore_legal.any(axis=1)]
+            explore = self.rng.random(batch) < eps
+            moves = np.where(explore, self._randomLegal(explore_legal), greedy)
+
+            next_keys, next_blanks, tile = self.step(keys, blanks, moves)
+            next_h = h + self.distance[tile, blanks] - self.distance[tile, next_blanks]
+            next_rows = self.index(next_keys)
+            at_goal = next_keys == self.goal_key
+            reward = np.where(at_goal, GOAL_REWARD, -1.0 + (h - next_h))
+            next_legal = dest_table[next_blanks] >= 0
+            best_next = np.where(next_legal, q[next_rows], -np.inf).max(axis=1)
+            target = reward + np.where(at_goal, 0.0, gamma * best_next)
+            q[rows, moves] += alpha * (target - q[rows, moves])
+            transitions += batch
+
+            steps += 1
+            finished = at_goal | (steps >= max_steps)
+            keys, blanks, rows, h, last = next_keys, next_blanks, next_rows, next_h, moves
+            count = int(finished.sum())
+            if count:
+                solved += int(at_goal.sum())
+                solved_steps += int(steps[at_goal].sum())
+                done += count
+                keys[finished], blanks[finished] = restart(count, done)
+                rows[finished] = self.index(keys[finished])
+                h[finished] = self.manhattan(keys[finished])
+                steps[finished] = 0
+                last[finished] = -1
+                if verbose and done // 10000 != (done - count) // 10000:
+                    print ("episodes: " + str(done) + " : " + "solved: %.1f%%" % (100.0 * solved / done))
+
+        elapsed = time.perf_counter() - started
+        return dict(episodes=done, solved=solved, success_rate=solved / done,
+                    mean_solved_steps=solved_steps / solved if solved else None,
+                    transitions=transitions, transitions_per_sec=transitions / elapsed,
+                    elapsed=elapsed)
+
+    # -- using the policy ------------------------------------------------------------
+
+    def policy(self):
+        """Greedy move of every table row.  A ranked row is one board, so
+        moves off its edge are masked out; a hashed row is shared by
+        several boards and keeps its plain argmax."""
+        if not self.ranked:
+            return self.q.argmax(axis=1).astype(np.uint8)
+        rows = np.arange(len(self.q), dtype=np.int64)
+        # Lehmer digits of every rank: the blank (tile 0, the smallest) sits
+        # in the first cell whose digit is 0
+        digits = (rows[:, None] // self.expander.weights) % (self.cells - np.arange(self.cells))
+        blanks = np.argmax(digits == 0, axis=1)
+        legal = self.expander.dest[blanks] >= 0
+        return np.where(legal, self.q, -np.inf).argmax(axis=1).astype(np.uint8)
+
+    def solve(self, puzzle, max_steps=200):
+        """Follow the greedy policy from a board; the list of moves, or None
+        if it does not reach the goal within max_steps or revisits a board"""
+        keys = self.expander.toKeys([NPuzzle(puzzle).hash])
+        blanks = self.expander.blanks(keys)
+        seen = set()
+        moves = []
+        while keys[0] != self.goal_key:
+            if len(moves) >= max_steps or int(keys[0]) in seen:
+                return None
+            seen.add(int(keys[0]))
+            legal = self.expander.dest[blanks[0]] >= 0
+            m = int(np.where(legal, self.q[self.index(keys)[0]], -np.inf).argmax())
+            keys, blanks, tile = self.step(keys, blanks, np.array([m]))
+            moves.append(m)
+        return moves
+
+    def export(self, path):
+        """Write the greedy policy, 2 bits per row, for the front end"""
+        policy = self.policy()
+        padded = np.zeros(-(-len(policy) // 4) * 4, dtype=np.uint8)
+        padded[:len(policy)] = policy
+        packed = padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)
+        with open(path, "w") as f:
+            json.dump(dict(format="npuzzle-policy", version=1, size=self.N,
+                           index="rank" if self.ranked else "hash", hash_bits=self.hash_bits,
+                           hash_multiplier=hex(HASH_MULTIPLIER), moves="UDLR",
+                           policy=base64.b64encode(packed.tobytes()).decode("ascii")), f)
+
+## =================================================================
+
+if __name__ == '__main__':
+    import sys
+
+    # python QLearning.py [N] [episodes] [policy file]
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    episodes = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    path = sys.argv[3] if len(sys.argv) > 3 else "rl/policy-%dx%d.json" % (N, N)
+
+    learner = QLearner(N)
+    print (learner.train(episodes, verbose=True))
+    learner.export(path)
+
+    puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3)) if N == 3 else None
+    if puzzle is not None:
+        moves = learner.solve(puzzle)
+        print ("policy solution: " + ("none" if moves is None else str(len(moves)) + " moves"))
@@ -0,0 +1,69 @@
+"""Instrumentation for the expansion loop of a search.
+
+Pass a SearchStats as stats= to a search (Astar, BoundedAstar in spill
+mode) and it is updated once per expansion with the live counters, the f
+and h of the expanded state and the frontier size.  Without one the
+searches run their plain loop, so instrumentation costs nothing when off.
+
+    def progress(stats):
+        print (stats.expanded, stats.rate(), len(stats.frontier))
+
+    stats = SearchStats(every=100000, callback=progress)
+    Astar.search(state, stats=stats)
+    print (stats.summary())
+"""
+
+import time
+from collections import Counter
+
+
+class SearchStats:
+    """Counters, f/h histograms and sampled frontier sizes of one search.
+
+    every/callback: callback(stats) is called every `every` expansions.
+    sample: the frontier size is recorded every `sample` expansions.
+    """
+
+    def __init__(self, every=0, callback=None, sample=1024):
+        assert not every or callback is not None, "every needs a callback"
+        self.every = every
+        self.callback = callback
+        self.sample = sample
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.reopened = 0
+        self.stale = 0
+        self.f_histogram = Counter()
+        self.h_histogram = Counter()
+        self.frontier = []      # (expansions so far, frontier size)
+        self.started = time.perf_counter()
+
+    def record(self, f, h, frontier, generated, duplicates, reopened=0, stale=0):
+        """One expansion, with the search's running totals"""
+        self.expanded += 1
+        self.generated = generated
+        self.duplicates = duplicates
+        self.reopened = reopened
+        self.stale = stale
+        self.f_histogram[f] += 1
+        self.h_histogram[h] += 1
+        if not self.expanded % self.sample:
+            self.frontier.append((self.expanded, frontier))
+        if self.every and not self.expanded % self.every:
+            self.callback(self)
+
+    def rate(self):
+        """Expansions per second so far"""
+        elapsed = time.perf_counter() - self.started
+        return self.expanded / elapsed if elapsed else 0.0
+
+    def summary(self):
+        """Plain dict of everything recorded, for JSON output"""
+        return dict(expanded=self.expanded, generated=self.generated,
+                    duplicates=self.duplicates, reopened=self.reopened, stale=self.stale,
+                    f_histogram=dict(sorted(self.f_histogram.items())),
+                    h_histogram=dict(sorted(self.h_histogram.items())),
+                    frontier=self.frontier,
+                    max_frontier=max([size for n, size in self.frontier], default=0),
+                    elapsed=time.perf_counter() - self.started)
@@ -0,0 +1,280 @@
+"""Streaming solver service over JSON lines.
+
+Requests and responses are one JSON object per line, on stdin/stdout or
+on a Unix socket (one stream per connection):
+
+    {"id": 1, "board": [[9,4,8],[6,1,2],[7,5,3]], "algorithm": "idastar", "deadline": 10}
+    {"id": 1, "cancel": true}
+
+    {"id": 1, "status": "solved", "cost": 18, "moves": "RDLU...", "expanded": 412, "elapsed": 0.01}
+
+algorithm is any of Batch.ALGORITHMS (default idastar); deadline is
+seconds from when the request is read, and a board still queued or
+solving when it passes comes back with status "timeout".  No board is
+solved for longer than the service's max_time (MAX_TIME seconds by
+default), deadline or not.  A cancelled request is answered "cancelled"
+at once; a board already on a worker is left to stop at its time limit,
+so it holds that worker for at most max_time, and its result is dropped.
+Cancelling an id that is not pending is answered with an error.
+Responses stream back as boards finish, so they can arrive out of order.
+
+stdin and stdout may also be regular files (python Service.py <
+boards.ndjson > out.jsonl); those are read on a thread and written with
+plain blocking writes.
+
+Accepted requests wait in a bounded queue for the worker pool.  When the
+queue is full the service stops reading, so a fast client is held back
+by its own transport instead of piling up work in memory.
+
+    python Service.py --workers 4 --queue 64
+    python Service.py --socket /tmp/npuzzle.sock --heuristic pdb/4x4-663.pdb
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import Batch
+
+MAX_TIME = 60.0     # seconds any one board may hold a worker
+
+
+class _Job:
+    __slots__ = ("id", "board", "algorithm", "deadline", "connection", "cancelled", "finished")
+
+    def __init__(self, id, board, algorithm, deadline, connection, finished):
+        self.id = id
+        self.board = board
+        self.algorithm = algorithm
+        self.deadline = deadline        # loop time, or None
+        self.connection = connection
+        self.cancelled = False
+        self.finished = finished
+
+
+class _Connection:
+    """One request stream and the jobs it has in flight"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = dict()   # id -> _Job
+
+    async def send(self, response):
+        self.writer.write((json.dumps(response) + "\n").encode())
+        await self.writer.drain()
+
+    def finish(self, job):
+        # a cancelled job finishing late must not drop a newer job with its id
+        if self.pending.get(job.id) is job:
+            del self.pending[job.id]
+        if not job.finished.done():
+            job.finished.set_result(None)
+
+
+class _FileReader:
+    """StreamReader stand-in for a regular file, read on a thread"""
+
+    def __init__(self, f):
+        self.f = f
+
+    async def readline(self):
+        return await asyncio.get_running_loop().run_in_executor(None, self.f.readline)
+
+
+class _FileWriter:
+    """StreamWriter stand-in for a regular file: plain blocking writes"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, data):
+        self.f.write(data)
+
+    async def drain(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.flush()
+
+
+def _isFile(f):
+    return stat.S_ISREG(os.fstat(f.fileno()).st_mode)
+
+
+def _response(id, result):
+    response = {"id": id, "status": result.status, "cost": result.cost,
+                "moves": result.moveString() if result.moves is not None else None,
+                "expanded": result.stats.get("expanded"), "elapsed": result.stats.get("elapsed")}
+    if "error" in result.stats:
+        response["error"] = result.stats["error"]
+    return response
+
+
+class SolverService:
+    """Reads boards, solves them on a process pool, streams the results"""
+
+    def __init__(self, workers=None, queue_size=64, heuristic=None, algorithm="idastar",
+                 deadline=None, max_time=MAX_TIME):
+        assert algorithm in Batch.ALGORITHMS, "Unknown algorithm: " + str(algorithm)
+        self.workers = workers or os.cpu_count()
+        self.queue_size = queue_size
+        self.heuristic = heuristic      # pattern database path, opened by every worker
+        self.algorithm = algorithm
+        self.deadline = deadline        # default seconds per request
+        self.max_time = max_time        # cap on any one solve, so no job pins a worker
+        self.pool = None
+        self.queue = None
+        self.dispatchers = []
+
+    async def start(self):
+        self.pool = ProcessPoolExecutor(self.workers, initializer=Batch._init,
+                                        initargs=(self.heuristic,))
+        self.queue = asyncio.Queue(self.queue_size)
+        self.dispatchers = [asyncio.ensure_future(self._dispatch()) for i in range(self.workers)]
+
+    async def close(self):
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    async def _dispatch(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                response = await self._run(job)
+                if response is not None and not job.cancelled:
+                    await job.connection.send(response)
+            except asyncio.CancelledError:
+                raise
+            except OSError:
+                pass        # the client has gone away: drop its answer, keep serving
+            finally:
+                job.connection.finish(job)
+                self.queue.task_done()
+
+    async def _run(self, job):
+        """Response for one job, None if it was cancelled while queued"""
+        loop = asyncio.get_running_loop()
+        if job.cancelled:
+            return None
+        remaining = self.max_time
+        if job.deadline is not None:
+            remaining = min(remaining, job.deadline - loop.time())
+        if remaining <= 0:
+            return {"id": job.id, "status": "timeout"}
+        try:
+            index, result = await loop.run_in_executor(
+                self.pool, Batch._solve, (job.id, job.board, job.algorithm, remaining))
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            return {"id": job.id, "status": "error", "error": repr(error)}
+        return _response(job.id, result)
+
+    async def _request(self, connection, line):
+        """Queue (or cancel) one request line; waits while the queue is full"""
+        loop = asyncio.get_running_loop()
+        try:
+            request = json.loads(line)
+            id = request["id"]
+        except (ValueError, KeyError, TypeError) as error:
+            await connection.send({"id": None, "status": "error", "error": repr(error)})
+            return
+        if not isinstance(id, (str, int)):
+            await connection.send({"id": None, "status": "error", "error": "id must be a string or integer"})
+            return
+
+        if request.get("cancel"):
+            job = connection.pending.get(id)
+            if job is None:
+                await connection.send({"id": id, "status": "error", "error": "unknown id"})
+                return
+            job.cancelled = True
+            await connection.send({"id": id, "status": "cancelled"})
+            connection.finish(job)
+            return
+
+        algorithm = request.get("algorithm", self.algorithm)
+        if algorithm not in Batch.ALGORITHMS or id in connection.pending or "board" not in request:
+            await connection.send({"id": id, "status": "error", "error": "bad request"})
+            return
+        deadline = request.get("deadline", self.deadline)
+        if deadline is not None and (isinstance(deadline, bool) or not isinstance(deadline, (int, float))
+                                     or not deadline >= 0):
+            await connection.send({"id": id, "status": "error", "error": "bad deadline"})
+            return
+        job = _Job(id, request["board"], algorithm,
+                   None if deadline is None else loop.time() + deadline,
+                   connection, loop.create_future())
+        connection.pending[id] = job
+        await self.queue.put(job)
+
+    async def handle(self, reader, writer):
+        """Serve one stream until end of input and all its answers are sent"""
+        connection = _Connection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await self._request(connection, line)
+            await asyncio.gather(*[job.finished for job in list(connection.pending.values())])
+        except ConnectionError:
+            # the client went away: its queued boards are not worth solving
+            for job in connection.pending.values():
+                job.cancelled = True
+        finally:
+            writer.close()
+
+    async def serveStdio(self):
+        # the pipe transports take pipes, sockets and ttys only, not regular files
+        loop = asyncio.get_running_loop()
+        if _isFile(sys.stdin):
+            reader = _FileReader(sys.stdin.buffer)
+        else:
+            reader = asyncio.StreamReader()
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        if _isFile(sys.stdout):
+            writer = _FileWriter(sys.stdout.buffer)
+        else:
+            transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+            writer = asyncio.StreamWriter(transport, protocol, None, loop)
+        await self.handle(reader, writer)
+
+    async def serveUnix(self, path):
+        server = await asyncio.start_unix_server(self.handle, path)
+        async with server:
+            await server.serve_forever()
+
+
+async def _main(args):
+    service = SolverService(args.workers, args.queue, args.heuristic, args.algorithm, args.deadline,
+                            args.max_time)
+    await service.start()
+    try:
+        if args.socket:
+            await service.serveUnix(args.socket)
+        else:
+            await service.serveStdio()
+    finally:
+        await service.close()
+
+## =================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solve boards streamed as JSON lines")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of stdin/stdout")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--queue", type=int, default=64, help="boards waiting for a worker")
+    parser.add_argument("--heuristic", help="pattern database path (default Manhattan)")
+    parser.add_argument("--algorithm", default="idastar", choices=sorted(Batch.ALGORITHMS))
+    parser.add_argument("--deadline", type=float, help="default seconds per request")
+    parser.add_argument("--max-time", type=float, default=MAX_TIME,
+                        help="seconds any one board may be solved for, deadline or not")
+    asyncio.run(_main(parser.parse_args()))
@@ -1,16 +1,72 @@
-try:
-    import Queue as Q  # ver. < 3.0
-except ImportError:
-    import queue as Q
-    
-
-def solution(finalNode):
-# build the solution list
-    solution = Q.LifoQueue()
-    node = finalNode
-    while node.parent:
-        solution.put(node.state)
-        node = node.parent
-    while not solution.empty():
-        s = solution.get()
-        s.toPrint()
+from PackedState import MOVE_NAMES, OPPOSITE
+
+
+def permutationRank(layout, state):
+    """Lehmer rank of a packed board (the blank counts as tile 0)"""
+    mask = layout.mask
+    cells = layout.cells
+    rank = 0
+    seen = 0
+    for i, shift in enumerate(layout.shifts):
+        t = (state >> shift) & mask
+        rank = rank * (cells - i) + t - bin(seen & ((1 << t) - 1)).count("1")
+        seen |= 1 << t
+    return rank
+
+
+def pathMoves(layout, table, final, start):
+    """Moves from start to final, in place of parent pointers.
+
+    The searches keep one table entry per reached state whose low two
+    bits are the move that reached it (g << 2 | move in the g tables),
+    so the path is rebuilt by stepping back from the final state with the
+    opposite moves until the start is reached."""
+    moves = []
+    packed = final
+    while packed != start:
+        m = table[packed] & 3
+        moves.append(m)
+        packed = layout.apply(packed, OPPOSITE[m])
+    moves.reverse()
+    return moves
+
+
+def solution(layout, table, final, start):
+    """Solution from start to final as a string of blank moves, e.g. 'ULDR'"""
+    return "".join(MOVE_NAMES[m] for m in pathMoves(layout, table, final, start))
+
+
+class SearchResult:
+    """Outcome of a search: the moves found (blank directions) and statistics"""
+
+    def __init__(self, start, layout, moves=None, status="solved", **stats):
+        self.start = start
+        self.layout = layout
+        self.moves = moves
+        self.status = status
+        self.stats = stats
+
+    @property
+    def solved(self):
+        return self.status == "solved"
+
+    @property
+    def cost(self):
+        """Number of moves in the solution (None if there is none)"""
+        return None if self.moves is None else len(self.moves)
+
+    def moveString(self):
+        """Solution as a string of blank moves, e.g. 'ULDR'"""
+        return "".join(MOVE_NAMES[m] for m in self.moves)
+
+    def path(self):
+        """Boards from the start to the goal, rebuilt by replaying the moves"""
+        packed = self.start
+        boards = [self.layout.unpack(packed)]
+        for m in self.moves:
+            packed = self.layout.apply(packed, m)
+            boards.append(self.layout.unpack(packed))
+        return boards
+
+    def __repr__(self):
+        return "SearchResult(%s, cost=%s, %s)" % (self.status, self.cost, self.stats)
@@ -0,0 +1,174 @@
+"""Cache of optimal solutions keyed by canonical board.
+
+A board and its mirror image have the same optimal cost: reflect the
+board in its main diagonal and relabel every tile with the tile that
+sits at the reflected cell of the goal, and the goal maps onto itself.
+Blank moves mirror too (up <-> left, down <-> right), so one stored
+solution answers both.  The canonical key of a board is the smaller of
+its packed state and its mirror's.
+
+Entries live in an in-memory LRU, backed by an optional sqlite file so
+they survive restarts:
+
+    cache = SolutionCache("solutions.sqlite")
+    result = cache.solve(EightPuzzle(puzzle))     # searches once
+    result = cache.solve(EightPuzzle(puzzle))     # stats["cached"] == "memory"
+
+Only optimal searches should be cached (Astar or IDAstar without weights).
+"""
+
+import sqlite3
+import time
+from collections import OrderedDict
+
+import Astar
+from PackedState import PackedBoard, MOVE_NAMES, UP, DOWN, LEFT, RIGHT
+from Solution import SearchResult
+
+# blank move in the mirrored board for every move of the original
+MIRROR_MOVE = {UP: LEFT, DOWN: RIGHT, LEFT: UP, RIGHT: DOWN}
+
+
+class Mirror:
+    """Diagonal reflection with relabeled tiles, for one goal"""
+
+    _mirrors = dict()
+
+    @classmethod
+    def forGoal(cls, goal):
+        """Return the (cached) mirror for a goal board"""
+        key = tuple(map(tuple, goal))
+        mirror = cls._mirrors.get(key)
+        if mirror is None:
+            mirror = cls._mirrors[key] = cls(key)
+        return mirror
+
+    def __init__(self, goal):
+        self.N = N = len(goal)
+        self.layout = layout = PackedBoard.forSize(N)
+        self.goal_state = layout.pack(goal)
+        blank = layout.blank(self.goal_state)
+        # the goal is only its own mirror if its blank is on the diagonal
+        self.symmetric = blank // N == blank % N
+        # relabel[t]: tile number (packed, blank == 0) replacing tile t
+        self.relabel = [0] * (layout.cells + 1)
+        for r in range(N):
+            for c in range(N):
+                self.relabel[layout.tile(self.goal_state, r * N + c)] = \
+                    layout.tile(self.goal_state, c * N + r)
+        # (source shift, mirrored shift) for every cell
+        self.pairs = tuple((layout.shifts[r * N + c], layout.shifts[c * N + r])
+                           for r in range(N) for c in range(N))
+        self.transpose = tuple(c * N + r for r in range(N) for c in range(N))
+
+    def mirror(self, state):
+        """Packed state of the mirrored board"""
+        mask = self.layout.mask
+        relabel = self.relabel
+        mirrored = 0
+        for src, dst in self.pairs:
+            mirrored |= relabel[(state >> src) & mask] << dst
+        blank = self.transpose[state >> self.layout.blank_shift]
+        return mirrored | (blank << self.layout.blank_shift)
+
+    def canonical(self, state):
+        """(canonical state, True if that is the mirror of state)"""
+        if not self.symmetric:
+            return state, False
+        mirrored = self.mirror(state)
+        if mirrored < state:
+            return mirrored, True
+        return state, False
+
+
+class SolutionCache:
+    """LRU of solutions with an optional persistent sqlite tier"""
+
+    def __init__(self, path=None, capacity=100000, algorithm=Astar.search):
+        self.capacity = capacity
+        self.algorithm = algorithm
+        self.entries = OrderedDict()    # key -> move string of the canonical board
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, moves TEXT)")
+            self.db.commit()
+
+    def _key(self, state):
+        """(cache key, mirrored) for a puzzle object"""
+        mirror = Mirror.forGoal(state.goal)
+        canonical, mirrored = mirror.canonical(state.hash)
+        return "%d:%x:%x" % (mirror.N, mirror.goal_state, canonical), mirrored
+
+    def _remember(self, key, moves):
+        self.entries[key] = moves
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get(self, state):
+        """(moves, tier) for a cached board, or (None, None)"""
+        key, mirrored = self._key(state)
+        tier = "memory"
+        moves = self.entries.get(key)
+        if moves is not None:
+            self.entries.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute("SELECT moves FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                moves = row[0]
+                tier = "disk"
+                self._remember(key, moves)
+        if moves is None:
+            return None, None
+        moves = [MOVE_NAMES.index(m) for m in moves]
+        if mirrored:
+            moves = [MIRROR_MOVE[m] for m in moves]
+        return moves, tier
+
+    def put(self, state, moves):
+        """Store an optimal solution (list of blank moves) for a board"""
+        key, mirrored = self._key(state)
+        if mirrored:
+            moves = [MIRROR_MOVE[m] for m in moves]
+        moves = "".join(MOVE_NAMES[m] for m in moves)
+        self._remember(key, moves)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (key, moves))
+            self.db.commit()
+
+    def solve(self, state, heuristic=None, time_limit=None):
+        """SearchResult from the cache, or from a search that is then cached"""
+        started = time.perf_counter()
+        moves, tier = self.get(state)
+        if moves is not None:
+            self.hits += 1
+            return SearchResult(state.hash, state.layout, moves, cached=tier,
+                                elapsed=time.perf_counter() - started)
+        self.misses += 1
+        result = self.algorithm(state, heuristic, time_limit=time_limit)
+        if result.solved:
+            self.put(state, result.moves)
+        return result
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+## =================================================================
+
+if __name__ == '__main__':
+    from EightPuzzle import EightPuzzle
+
+    cache = SolutionCache()
+    puzzle = ((9, 4, 8), (6, 1, 2), (7, 5, 3))
+    mirrored = tuple(zip(*puzzle))
+    relabel = {1: 1, 2: 4, 3: 7, 4: 2, 5: 5, 6: 8, 7: 3, 8: 6, 9: 9}
+    mirrored = tuple(tuple(relabel[t] for t in row) for row in mirrored)
+
+    for board in (puzzle, puzzle, mirrored):
+        result = cache.solve(EightPuzzle(board))
+        print (result.moveString() + " : " + str(result.stats))
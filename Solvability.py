@@ -0,0 +1,50 @@
+"""Solvability and solution-length parity, checked before any search.
+
+Every move swaps the blank with a neighbour: one transposition of the
+board permutation, and one step of the blank.  So a board can reach a
+goal only if the parity of the permutation between them equals the
+parity of the blank's Manhattan displacement, and every solution has
+the parity of that displacement.  Both are found in O(N^2) from the
+cycle structure of the permutation, without counting inversions pairwise.
+"""
+
+
+def _flat(layout, state):
+    return [layout.tile(state, c) for c in range(layout.cells)]
+
+
+def permutationParity(layout, state, goal_state):
+    """Parity (0/1) of the permutation taking state to goal_state"""
+    board = _flat(layout, state)
+    goal_cell = [0] * layout.cells
+    for cell, tile in enumerate(_flat(layout, goal_state)):
+        goal_cell[tile] = cell
+
+    seen = [False] * layout.cells
+    cycles = 0
+    for start in range(layout.cells):
+        if seen[start]:
+            continue
+        cycles += 1
+        cell = start
+        while not seen[cell]:
+            seen[cell] = True
+            cell = goal_cell[board[cell]]
+    return (layout.cells - cycles) & 1
+
+
+def solutionParity(layout, state, goal_state):
+    """Parity (0/1) shared by the lengths of all solutions"""
+    br, bc = divmod(layout.blank(state), layout.N)
+    gr, gc = divmod(layout.blank(goal_state), layout.N)
+    return (abs(br - gr) + abs(bc - gc)) & 1
+
+
+def isSolvable(layout, state, goal_state):
+    """Can packed state reach packed goal_state?"""
+    return permutationParity(layout, state, goal_state) == solutionParity(layout, state, goal_state)
+
+
+def puzzleIsSolvable(puzzle):
+    """Solvability of a puzzle object against its class goal"""
+    return isSolvable(puzzle.layout, puzzle.hash, puzzle.manhattan.goal_state)
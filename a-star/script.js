@@ -1,25 +1,3 @@
-// Node class for A* search
-class SearchNode {
-    constructor(puzzle, emptyPos, parent = null, move = null, gCost = 0) {
-        this.puzzle = puzzle.map(row => [...row]);
-        this.emptyPos = { ...emptyPos };
-        this.parent = parent;
-        this.move = move;
-        this.gCost = gCost;
-        this.hCost = 0;
-        this.fCost = 0;
-        this.stateKey = this.getStateKey();
-    }
-    
-    getStateKey() {
-        return this.puzzle.flat().join(',');
-    }
-    
-    equals(other) {
-        return this.stateKey === other.stateKey;
-    }
-}
-
 class SlidingPuzzleAStar {
     constructor() {
         this.size = 3;
@@ -32,6 +10,9 @@ class SlidingPuzzleAStar {
         this.nodesInQueue = 0;
         this.searchTime = 0;
         this.heuristicFunction = 'manhattan';
+        this.worker = null;
+        this.finishSearch = null;
+        this.nodeLimit = 2000000;
         
         this.initializeElements();
         this.setupEventListeners();
@@ -275,178 +256,62 @@ class SlidingPuzzleAStar {
         }
     }
     
-    // Heuristic functions
-    manhattanDistance(puzzle) {
-        let distance = 0;
-        for (let i = 0; i < this.size; i++) {
-            for (let j = 0; j < this.size; j++) {
-                const value = puzzle[i][j];
-                if (value !== 0) {
-                    const targetRow = Math.floor((value - 1) / this.size);
-                    const targetCol = (value - 1) % this.size;
-                    distance += Math.abs(i - targetRow) + Math.abs(j - targetCol);
-                }
+    // The search runs in worker.js so the page stays responsive; progress
+    // arrives in batches and Stop terminates the worker.
+    aStar() {
+        return new Promise(resolve => {
+            const startTime = Date.now();
+            this.nodesExplored = 0;
+            this.log(`🔍 Starting A* search with ${this.getHeuristicName()}...`, 'info');
+            
+            try {
+                this.worker = new Worker('worker.js');
+            } catch (error) {
+                this.log(`❌ Could not start the search worker: ${error.message}`, 'error');
+                resolve(null);
+                return;
             }
-        }
-        return distance;
-    }
-    
-    misplacedTiles(puzzle) {
-        let misplaced = 0;
-        for (let i = 0; i < this.size; i++) {
-            for (let j = 0; j < this.size; j++) {
-                const value = puzzle[i][j];
-                if (value !== 0) {
-                    const expectedValue = i * this.size + j + 1;
-                    if (value !== expectedValue) {
-                        misplaced++;
-                    }
+            this.finishSearch = solution => {
+                if (this.worker) {
+                    this.worker.terminate();
+                    this.worker = null;
                 }
-            }
-        }
-        return misplaced;
-    }
-    
-    euclideanDistance(puzzle) {
-        let distance = 0;
-        for (let i = 0; i < this.size; i++) {
-            for (let j = 0; j < this.size; j++) {
-                const value = puzzle[i][j];
-                if (value !== 0) {
-                    const targetRow = Math.floor((value - 1) / this.size);
-                    const targetCol = (value - 1) % this.size;
-                    distance += Math.sqrt(Math.pow(i - targetRow, 2) + Math.pow(j - targetCol, 2));
-                }
-            }
-        }
-        return distance;
-    }
-    
-    combinedHeuristic(puzzle) {
-        return this.manhattanDistance(puzzle) + (this.misplacedTiles(puzzle) * 2);
-    }
-    
-    calculateHeuristic(puzzle) {
-        switch (this.heuristicFunction) {
-            case 'manhattan': return this.manhattanDistance(puzzle);
-            case 'misplaced': return this.misplacedTiles(puzzle);
-            case 'euclidean': return this.euclideanDistance(puzzle);
-            case 'combined': return this.combinedHeuristic(puzzle);
-            default: return this.manhattanDistance(puzzle);
-        }
-    }
-    
-    getNeighbors(node) {
-        const neighbors = [];
-        const validMoves = this.getValidMoves(node.emptyPos);
-        
-        for (const move of validMoves) {
-            const newPuzzle = node.puzzle.map(row => [...row]);
-            const newEmptyPos = { ...node.emptyPos };
-            
-            // Make the move
-            newPuzzle[newEmptyPos.row][newEmptyPos.col] = newPuzzle[move.row][move.col];
-            newPuzzle[move.row][move.col] = 0;
-            newEmptyPos.row = move.row;
-            newEmptyPos.col = move.col;
-            
-            const neighbor = new SearchNode(
-                newPuzzle,
-                newEmptyPos,
-                node,
-                { from: node.emptyPos, to: move, tile: newPuzzle[newEmptyPos.row][newEmptyPos.col] },
-                node.gCost + 1
-            );
-            
-            neighbor.hCost = this.calculateHeuristic(newPuzzle);
-            neighbor.fCost = neighbor.gCost + neighbor.hCost;
-            
-            neighbors.push(neighbor);
-        }
-        
-        return neighbors;
-    }
-    
-    reconstructPath(node) {
-        const path = [];
-        let current = node;
-        
-        while (current.parent) {
-            path.unshift(current.move);
-            current = current.parent;
-        }
-        
-        return path;
-    }
-    
-    async aStar() {
-        const startTime = Date.now();
-        const startNode = new SearchNode(this.puzzle, this.emptyPos);
-        startNode.hCost = this.calculateHeuristic(this.puzzle);
-        startNode.fCost = startNode.gCost + startNode.hCost;
-        
-        const openSet = [startNode];
-        const closedSet = new Set();
-        this.nodesExplored = 0;
-        
-        this.log(`🔍 Starting A* search with ${this.getHeuristicName()}...`, 'info');
-        
-        while (openSet.length > 0 && this.isSolving) {
-            // Sort by fCost (lowest first), then by hCost
-            openSet.sort((a, b) => {
-                if (a.fCost !== b.fCost) return a.fCost - b.fCost;
-                return a.hCost - b.hCost;
-            });
-            
-            const current = openSet.shift();
-            this.nodesExplored++;
-            this.nodesInQueue = openSet.length;
-            
-            if (this.isSolved(current.puzzle)) {
+                this.finishSearch = null;
                 this.searchTime = Date.now() - startTime;
-                this.solution = this.reconstructPath(current);
                 this.updateStats();
-                this.log(`✅ Solution found! ${this.solution.length} moves, ${this.nodesExplored} nodes explored`, 'success');
-                return this.solution;
-            }
-            
-            closedSet.add(current.stateKey);
+                resolve(solution);
+            };
             
-            const neighbors = this.getNeighbors(current);
-            
-            for (const neighbor of neighbors) {
-                if (closedSet.has(neighbor.stateKey)) continue;
-                
-                const existingNode = openSet.find(node => node.stateKey === neighbor.stateKey);
-                
-                if (!existingNode) {
-                    openSet.push(neighbor);
-                } else if (neighbor.gCost < existingNode.gCost) {
-                    // Better path found
-                    existingNode.gCost = neighbor.gCost;
-                    existingNode.fCost = neighbor.fCost;
-                    existingNode.parent = neighbor.parent;
-                    existingNode.move = neighbor.move;
+            this.worker.onmessage = event => {
+                const message = event.data;
+                this.nodesExplored = message.explored;
+                this.nodesInQueue = message.queued;
+                if (message.type === 'progress') {
+                    this.updateStats();
+                    this.updateProgress(this.nodesExplored, this.nodeLimit);
+                    return;
                 }
-            }
-            
-            // Update progress and stats periodically
-            if (this.nodesExplored % 100 === 0) {
-                this.updateStats();
-                this.updateProgress(this.nodesExplored, Math.min(this.nodesExplored * 2, 10000));
-                await new Promise(resolve => setTimeout(resolve, 1));
-            }
+                this.solution = message.solution;
+                if (message.solution) {
+                    this.log(`✅ Solution found! ${message.solution.length} moves, ${message.explored} nodes explored`, 'success');
+                } else if (message.explored > this.nodeLimit) {
+                    this.log('⚠️ Search limit reached. Puzzle may be too complex.', 'warning');
+                }
+                this.finishSearch(message.solution);
+            };
+            this.worker.onerror = event => {
+                this.log(`❌ Search worker failed: ${event.message}`, 'error');
+                this.finishSearch(null);
+            };
             
-            // Prevent infinite search
-            if (this.nodesExplored > 100000) {
-                this.log('⚠️ Search limit reached. Puzzle may be too complex.', 'warning');
-                break;
-            }
-        }
-        
-        this.searchTime = Date.now() - startTime;
-        this.updateStats();
-        return null; // No solution found
+            this.worker.postMessage({
+                type: 'solve',
+                size: this.size,
+                board: this.puzzle.flat(),
+                heuristic: this.heuristicFunction,
+                nodeLimit: this.nodeLimit
+            });
+        });
     }
     
     async startSolving() {
@@ -520,6 +385,7 @@ class SlidingPuzzleAStar {
     
     stopSolving() {
         this.isSolving = false;
+        if (this.finishSearch) this.finishSearch(null);
         this.elements.solveBtn.disabled = false;
         this.elements.stopBtn.disabled = true;
         this.setStatus('Stopped', 'idle');
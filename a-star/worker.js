@@ -0,0 +1,250 @@
+// A* search for the sliding puzzle, run in a Web Worker.
+//
+// Boards are flat typed arrays (0 is the blank).  Every search node lives
+// in a set of growable typed arrays (board pool, g, f, h, parent, moved
+// cell), states are keyed by an integer (the permutation rank up to 4x4,
+// a packed BigInt beyond), and the open list is a binary heap of node
+// indices with lazy deletion.
+//
+// In:  { type: 'solve', size, board, heuristic, nodeLimit }
+// Out: { type: 'progress', explored, queued }          every PROGRESS_EVERY nodes
+//      { type: 'done', solution, explored, queued, time }   solution is null if none
+//
+// Cancel by terminating the worker.
+
+const PROGRESS_EVERY = 5000;
+
+class NodeStore {
+    constructor(cells, capacity = 1 << 16) {
+        this.cells = cells;
+        this.count = 0;
+        this.allocate(capacity);
+    }
+
+    allocate(capacity) {
+        const old = this.boards;
+        const grow = (Type, array, width = 1) => {
+            const next = new Type(capacity * width);
+            if (array) next.set(array);
+            return next;
+        };
+        this.boards = grow(Uint8Array, old, this.cells);
+        this.g = grow(Int32Array, this.g);
+        this.h = grow(Float64Array, this.h);
+        this.f = grow(Float64Array, this.f);
+        this.parent = grow(Int32Array, this.parent);
+        this.blank = grow(Uint8Array, this.blank);
+        this.closed = grow(Uint8Array, this.closed);
+        this.capacity = capacity;
+    }
+
+    add(board, blank, g, h, parent) {
+        if (this.count === this.capacity) this.allocate(this.capacity * 2);
+        const i = this.count++;
+        this.boards.set(board, i * this.cells);
+        this.blank[i] = blank;
+        this.g[i] = g;
+        this.h[i] = h;
+        this.f[i] = g + h;
+        this.parent[i] = parent;
+        return i;
+    }
+
+    board(i) {
+        return this.boards.subarray(i * this.cells, (i + 1) * this.cells);
+    }
+}
+
+class NodeHeap {
+    // min-heap of node indices on (f, h)
+    constructor(store) {
+        this.store = store;
+        this.items = new Int32Array(1 << 16);
+        this.length = 0;
+    }
+
+    less(a, b) {
+        const f = this.store.f;
+        if (f[a] !== f[b]) return f[a] < f[b];
+        return this.store.h[a] < this.store.h[b];
+    }
+
+    push(node) {
+        if (this.length === this.items.length) {
+            const grown = new Int32Array(this.items.length * 2);
+            grown.set(this.items);
+            this.items = grown;
+        }
+        const items = this.items;
+        let i = this.length++;
+        while (i > 0) {
+            const up = (i - 1) >> 1;
+            if (!this.less(node, items[up])) break;
+            items[i] = items[up];
+            i = up;
+        }
+        items[i] = node;
+    }
+
+    pop() {
+        const items = this.items;
+        const top = items[0];
+        const last = items[--this.length];
+        let i = 0;
+        while (true) {
+            let child = 2 * i + 1;
+            if (child >= this.length) break;
+            if (child + 1 < this.length && this.less(items[child + 1], items[child])) child++;
+            if (!this.less(items[child], last)) break;
+            items[i] = items[child];
+            i = child;
+        }
+        if (this.length > 0) items[i] = last;
+        return top;
+    }
+}
+
+function makeKey(cells) {
+    if (cells <= 16) {
+        // Lehmer rank: below 16! < 2^53, so an exact Number
+        return board => {
+            let rank = 0;
+            for (let i = 0; i < cells; i++) {
+                let smaller = 0;
+                for (let j = 0; j < i; j++) {
+                    if (board[j] < board[i]) smaller++;
+                }
+                rank = rank * (cells - i) + board[i] - smaller;
+            }
+            return rank;
+        };
+    }
+    const bits = BigInt((cells - 1).toString(2).length);
+    return board => {
+        let key = 0n;
+        for (let i = 0; i < cells; i++) key = (key << bits) | BigInt(board[i]);
+        return key;
+    };
+}
+
+function makeHeuristic(size, name) {
+    const cells = size * size;
+    // distance tables per (tile, cell)
+    const manhattan = new Float64Array(cells * cells);
+    const euclidean = new Float64Array(cells * cells);
+    for (let tile = 1; tile < cells; tile++) {
+        const tr = Math.floor((tile - 1) / size);
+        const tc = (tile - 1) % size;
+        for (let cell = 0; cell < cells; cell++) {
+            const r = Math.floor(cell / size);
+            const c = cell % size;
+            manhattan[tile * cells + cell] = Math.abs(r - tr) + Math.abs(c - tc);
+            euclidean[tile * cells + cell] = Math.sqrt((r - tr) ** 2 + (c - tc) ** 2);
+        }
+    }
+    const sum = (table, board) => {
+        let total = 0;
+        for (let cell = 0; cell < cells; cell++) {
+            if (board[cell] !== 0) total += table[board[cell] * cells + cell];
+        }
+        return total;
+    };
+    const misplaced = board => {
+        let count = 0;
+        for (let cell = 0; cell < cells; cell++) {
+            if (board[cell] !== 0 && board[cell] !== cell + 1) count++;
+        }
+        return count;
+    };
+    switch (name) {
+        case 'misplaced': return board => misplaced(board);
+        case 'euclidean': return board => sum(euclidean, board);
+        case 'combined': return board => sum(manhattan, board) + misplaced(board) * 2;
+        default: return board => sum(manhattan, board);
+    }
+}
+
+function solve({ size, board, heuristic, nodeLimit }) {
+    const startTime = Date.now();
+    const cells = size * size;
+    const keyOf = makeKey(cells);
+    const h = makeHeuristic(size, heuristic);
+    const store = new NodeStore(cells);
+    const open = new NodeHeap(store);
+    const best = new Map();     // state key -> node index
+    const goalKey = keyOf(Uint8Array.from({ length: cells }, (_, i) => (i + 1) % cells));
+
+    // blank neighbours per cell
+    const neighbours = [];
+    for (let cell = 0; cell < cells; cell++) {
+        const r = Math.floor(cell / size);
+        const c = cell % size;
+        const list = [];
+        if (r > 0) list.push(cell - size);
+        if (r < size - 1) list.push(cell + size);
+        if (c > 0) list.push(cell - 1);
+        if (c < size - 1) list.push(cell + 1);
+        neighbours.push(list);
+    }
+
+    const start = Uint8Array.from(board);
+    const root = store.add(start, start.indexOf(0), 0, h(start), -1);
+    best.set(keyOf(start), root);
+    open.push(root);
+    const child = new Uint8Array(cells);
+    let explored = 0;
+    let found = -1;
+
+    while (open.length > 0) {
+        const current = open.pop();
+        if (store.closed[current]) continue;
+        const currentBoard = store.board(current);
+        const currentKey = keyOf(currentBoard);
+        if (best.get(currentKey) !== current) continue;      // superseded entry
+        store.closed[current] = 1;
+        explored++;
+
+        if (currentKey === goalKey) {
+            found = current;
+            break;
+        }
+        if (explored % PROGRESS_EVERY === 0) {
+            postMessage({ type: 'progress', explored, queued: open.length });
+        }
+        if (explored > nodeLimit) break;
+
+        const blank = store.blank[current];
+        const g = store.g[current] + 1;
+        for (const dest of neighbours[blank]) {
+            child.set(store.board(current));
+            child[blank] = child[dest];
+            child[dest] = 0;
+            const key = keyOf(child);
+            const known = best.get(key);
+            if (known !== undefined && (store.closed[known] || store.g[known] <= g)) continue;
+            const node = store.add(child, dest, g, h(child), current);
+            best.set(key, node);
+            open.push(node);
+        }
+    }
+
+    let solution = null;
+    if (found >= 0) {
+        solution = [];
+        for (let node = found; store.parent[node] >= 0; node = store.parent[node]) {
+            const from = store.blank[store.parent[node]];
+            const to = store.blank[node];
+            solution.push({
+                from: { row: Math.floor(from / size), col: from % size },
+                to: { row: Math.floor(to / size), col: to % size },
+                tile: store.board(node)[from]
+            });
+        }
+        solution.reverse();
+    }
+    postMessage({ type: 'done', solution, explored, queued: open.length, time: Date.now() - startTime });
+}
+
+self.onmessage = event => {
+    if (event.data.type === 'solve') solve(event.data);
+};
@@ -13,6 +13,7 @@ class SlidingPuzzleRL {
         this.trainingEmptyPos = null;
         this.episodes = 0;
         this.successCount = 0;
+        this.policy = null;
         
         this.initializeElements();
         this.setupEventListeners();
@@ -37,6 +38,7 @@ class SlidingPuzzleRL {
             progressFill: document.getElementById('progressFill'),
             newPuzzleBtn: document.getElementById('newPuzzleBtn'),
             trainBtn: document.getElementById('trainBtn'),
+            loadPolicyBtn: document.getElementById('loadPolicyBtn'),
             solveBtn: document.getElementById('solveBtn'),
             stopBtn: document.getElementById('stopBtn')
         };
@@ -46,6 +48,7 @@ class SlidingPuzzleRL {
         this.elements.puzzleSize.addEventListener('change', () => this.onPuzzleSizeChange());
         this.elements.newPuzzleBtn.addEventListener('click', () => this.newPuzzle());
         this.elements.trainBtn.addEventListener('click', () => this.startTraining());
+        this.elements.loadPolicyBtn.addEventListener('click', () => this.loadPolicy());
         this.elements.solveBtn.addEventListener('click', () => this.startSolving());
         this.elements.stopBtn.addEventListener('click', () => this.stopAll());
     }
@@ -67,7 +70,7 @@ class SlidingPuzzleRL {
         this.trainingEmptyPos = null;
         this.episodes = 0;
         this.successCount = 0;
-        this.elements.solveBtn.disabled = true;
+        this.elements.solveBtn.disabled = !this.hasPolicy();
     }
     
     log(message, type = '') {
@@ -339,6 +342,95 @@ class SlidingPuzzleRL {
         return true;
     }
     
+    // Policies exported by the offline trainer (QLearning.py): the greedy
+    // blank move (0-3 = up, down, left, right) of every table row, 2 bits
+    // each.  3x3 rows are permutation ranks, larger boards hash the board.
+    async loadPolicy() {
+        const url = `policy-${this.size}x${this.size}.json`;
+        try {
+            const response = await fetch(url);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const policy = await response.json();
+            if (policy.format !== 'npuzzle-policy' || policy.size !== this.size) {
+                throw new Error('not a policy for this puzzle size');
+            }
+            const raw = atob(policy.policy);
+            const data = new Uint8Array(raw.length);
+            for (let i = 0; i < raw.length; i++) data[i] = raw.charCodeAt(i);
+            this.policy = {
+                size: policy.size,
+                index: policy.index,
+                hashBits: policy.hash_bits,
+                multiplier: BigInt(policy.hash_multiplier),
+                data
+            };
+            this.elements.solveBtn.disabled = false;
+            this.log(`📥 Loaded trained policy ${url} (${(data.length / 1024).toFixed(0)} KB)`, 'success');
+        } catch (error) {
+            this.log(`❌ Could not load ${url}: ${error.message}`, 'error');
+        }
+    }
+    
+    hasPolicy() {
+        return this.policy !== null && this.policy.size === this.size;
+    }
+    
+    policyIndex(flat) {
+        const cells = flat.length;
+        if (this.policy.index === 'rank') {
+            let rank = 0;
+            for (let i = 0; i < cells; i++) {
+                let smaller = 0;
+                for (let j = 0; j < i; j++) {
+                    if (flat[j] < flat[i]) smaller++;
+                }
+                rank = rank * (cells - i) + flat[i] - smaller;
+            }
+            return rank;
+        }
+        const bits = BigInt((cells - 1).toString(2).length);
+        let key = 0n;
+        for (let i = 0; i < cells; i++) key |= BigInt(flat[i]) << (BigInt(i) * bits);
+        const mixed = (key * this.policy.multiplier) & ((1n << 64n) - 1n);
+        return Number(mixed >> BigInt(64 - this.policy.hashBits));
+    }
+    
+    policyPath() {
+        const directions = [{ row: -1, col: 0 }, { row: 1, col: 0 }, { row: 0, col: -1 }, { row: 0, col: 1 }];
+        const maxMoves = this.size === 3 ? 200 : this.size === 4 ? 500 : 1000;
+        const savedPuzzle = this.puzzle;
+        const savedEmpty = this.emptyPos;
+        this.puzzle = this.trainingPuzzle.map(row => [...row]);
+        this.emptyPos = { ...this.trainingEmptyPos };
+        
+        const seen = new Set();
+        let path = [];
+        while (!this.isSolved()) {
+            const key = this.getStateKey();
+            if (path.length >= maxMoves || seen.has(key)) {
+                path = null;
+                break;
+            }
+            seen.add(key);
+            const index = this.policyIndex(this.puzzle.flat());
+            const move = (this.policy.data[index >> 2] >> ((index & 3) * 2)) & 3;
+            const to = {
+                row: this.emptyPos.row + directions[move].row,
+                col: this.emptyPos.col + directions[move].col
+            };
+            const from = { ...this.emptyPos };
+            if (!this.makeMove(to.row, to.col, false)) {
+                path = null;
+                break;
+            }
+            path.push({ from, to, tile: this.puzzle[from.row][from.col] });
+        }
+        
+        this.puzzle = savedPuzzle;
+        this.emptyPos = savedEmpty;
+        return path;
+    }
+    
     async startTraining() {
         if (!this.trainingPuzzle) {
             this.log('⚠️ Please generate a new puzzle first!', 'warning');
@@ -436,7 +528,7 @@ class SlidingPuzzleRL {
         
         this.isTraining = false;
         this.elements.trainBtn.disabled = false;
-        this.elements.solveBtn.disabled = !this.bestSolution;
+        this.elements.solveBtn.disabled = !(this.bestSolution || this.hasPolicy());
         this.elements.stopBtn.disabled = true;
         this.updateStats();
         
@@ -450,7 +542,18 @@ class SlidingPuzzleRL {
     }
     
     async startSolving() {
-        if (!this.bestSolution) {
+        if (!this.trainingPuzzle) {
+            this.trainingPuzzle = this.puzzle.map(row => [...row]);
+            this.trainingEmptyPos = { ...this.emptyPos };
+        }
+        let solution = this.bestSolution;
+        if (!solution && this.hasPolicy()) {
+            solution = this.policyPath();
+            if (solution) {
+                this.log(`📥 Trained policy solves it in ${solution.length} moves`, 'success');
+            }
+        }
+        if (!solution) {
             this.log('❌ No solution available! Train the AI first.', 'error');
             return;
         }
@@ -470,10 +573,10 @@ class SlidingPuzzleRL {
         
         await new Promise(resolve => setTimeout(resolve, 1000));
         
-        for (let i = 0; i < this.bestSolution.length && this.isSolving; i++) {
-            const move = this.bestSolution[i];
+        for (let i = 0; i < solution.length && this.isSolving; i++) {
+            const move = solution[i];
             
-            this.log(`Step ${i + 1}/${this.bestSolution.length}: Moving tile ${move.tile}`);
+            this.log(`Step ${i + 1}/${solution.length}: Moving tile ${move.tile}`);
             
             // Animate the tile
             this.animateTile(move.to.row, move.to.col);
@@ -512,7 +615,7 @@ class SlidingPuzzleRL {
         this.isTraining = false;
         this.isSolving = false;
         this.elements.trainBtn.disabled = false;
-        this.elements.solveBtn.disabled = !this.bestSolution;
+        this.elements.solveBtn.disabled = !(this.bestSolution || this.hasPolicy());
         this.elements.stopBtn.disabled = true;
         this.setStatus('Stopped', 'idle');
         this.log('⏹️ Operation stopped', 'warning');